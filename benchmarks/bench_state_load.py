@@ -0,0 +1,76 @@
+"""Time loading large events/vault files through the validated state loader.
+
+Usage: python benchmarks/bench_state_load.py [events] [users] [items_per_user]
+
+Writes synthetic files to a temporary directory and compares the fast path
+(current version, clean data), the migration path (pre-versioning files)
+and a plain json.load of the same bytes.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot  # noqa: E402
+
+
+def best_of(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    n_events = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_users = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    n_items = int(sys.argv[3]) if len(sys.argv) > 3 else 40
+
+    events = {
+        str(1_000_000 + i): {
+            "accepted": {str(u): f"Character {u} - Lvl 5 Wizard" for u in range(i % 8)},
+            "waitlist": [str(100 + u) for u in range(i % 4)],
+            "max_participants": 6,
+            "title": f"Session {i}",
+            "event_time": "2026-10-23T02:00:00+00:00",
+        }
+        for i in range(n_events)
+    }
+    vault = {
+        str(u): [
+            {"description": f"Item {u}-{j}", "link": None, "rarity": "Rare", "types": "Weapons"}
+            for j in range(n_items)
+        ]
+        for u in range(n_users)
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, data, state in (
+            ("events", events, bot.StateFile(os.path.join(tmp, "events.json"), bot.EventRecord)),
+            ("vault", vault, bot.StateFile(os.path.join(tmp, "vault.json"), list[bot.VaultItem], item_type=bot.VaultItem)),
+        ):
+            with open(state.path, "w") as f:
+                json.dump(data, f)
+            with open(state.path, "rb") as f:
+                raw = f.read()
+            legacy = best_of(state.load)
+
+            state.save(state.load())
+            current = best_of(state.load)
+            baseline = best_of(lambda: json.loads(raw))
+
+            print(
+                f"{name:7s} {len(raw) / 1e6:6.2f} MB  "
+                f"fast path {current * 1000:8.1f} ms  "
+                f"migration {legacy * 1000:8.1f} ms  "
+                f"json.loads {baseline * 1000:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
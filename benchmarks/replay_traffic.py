@@ -0,0 +1,378 @@
+"""Replay recorded interaction traffic through the real handlers.
+
+Usage: python benchmarks/replay_traffic.py traffic.jsonl [--speed N]
+
+Record traffic by running the bot with RECORD_TRAFFIC_FILE set. The replay
+runs in a temporary directory against stand-in Discord objects, feeding each
+recorded command, button click, modal submission and reaction into the
+actual EventView, JoinModal, vault and trade handlers. --speed 1 keeps the
+recorded pacing, --speed 10 runs ten times faster and --speed 0 (default)
+runs back to back.
+
+Reports, per handler, the time until the handler returned ("ack") and until
+the outbound dispatcher drained ("settle"), plus REST calls by endpoint and
+persistence writes by file, so two builds can be compared on the same
+workload.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import traceback
+from collections import Counter, defaultdict, deque
+from itertools import count
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord  # noqa: E402
+from discord import app_commands  # noqa: E402
+
+import bot  # noqa: E402
+
+BUTTONS = {
+    "event_join": "join",
+    "event_waitlist": "waitlist",
+    "event_leave": "leave",
+    "event_finish": "finish_button",
+}
+
+rest_calls = Counter()
+snowflakes = count(10_000)
+
+
+class StandInUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.display_name = f"User {user_id}"
+        self.mention = f"<@{user_id}>"
+        self.bot = False
+
+
+class StandInGuild:
+    def __init__(self, replay):
+        self.replay = replay
+        self.text_channels = []
+
+    def get_member(self, user_id):
+        return self.replay.users.get(user_id)
+
+
+class StandInMessage:
+    def __init__(self, replay, channel, content=None, embed=None, embeds=None, message_id=None, **_):
+        self.id = message_id or next(snowflakes)
+        self.channel = channel
+        self.guild = channel.guild
+        self.content = content
+        self.embeds = [embed] if embed is not None else list(embeds or [])
+        self.replay = replay
+        replay.messages[self.id] = self
+
+    async def edit(self, embed=None, **_):
+        rest_calls["message.edit"] += 1
+        if embed is not None:
+            self.embeds = [embed]
+        return self
+
+    async def add_reaction(self, emoji):
+        rest_calls["message.add_reaction"] += 1
+
+    async def clear_reactions(self):
+        rest_calls["message.clear_reactions"] += 1
+
+    async def clear_reaction(self, emoji):
+        rest_calls["message.clear_reaction"] += 1
+
+    async def reply(self, content=None, **kwargs):
+        rest_calls["message.reply"] += 1
+        return StandInMessage(self.replay, self.channel, content=content, **kwargs)
+
+    def to_reference(self, **_):
+        return None
+
+
+class StandInChannel:
+    def __init__(self, replay, channel_id):
+        self.id = channel_id
+        self.replay = replay
+        self.guild = replay.guild
+
+    async def send(self, content=None, **kwargs):
+        rest_calls["channel.send"] += 1
+        return StandInMessage(self.replay, self, content=content, **kwargs)
+
+    async def fetch_message(self, message_id):
+        rest_calls["channel.fetch_message"] += 1
+        message = self.replay.messages.get(message_id)
+        if message is None:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Message")
+        return message
+
+    def get_partial_message(self, message_id):
+        return self.replay.messages.get(message_id) or StandInMessage(self.replay, self, message_id=message_id)
+
+
+class StandInResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.done = False
+
+    def is_done(self):
+        return self.done
+
+    def acknowledge(self):
+        if self.done:
+            raise RuntimeError("interaction acknowledged twice")
+        self.done = True
+
+    async def defer(self, **_):
+        rest_calls["interaction.defer"] += 1
+        self.acknowledge()
+
+    async def send_message(self, content=None, ephemeral=False, **kwargs):
+        rest_calls["interaction.send_message"] += 1
+        self.acknowledge()
+        if not ephemeral:
+            self.interaction.original = StandInMessage(
+                self.interaction.replay, self.interaction.channel, content=content, **kwargs
+            )
+
+    async def send_modal(self, modal):
+        rest_calls["interaction.send_modal"] += 1
+        self.acknowledge()
+        self.interaction.replay.pending_modals[self.interaction.user.id] = modal
+
+
+class StandInFollowup:
+    async def send(self, content=None, **_):
+        rest_calls["followup.send"] += 1
+
+
+class StandInInteraction:
+    def __init__(self, replay, user, channel, message=None):
+        self.replay = replay
+        self.id = next(snowflakes)
+        self.application_id = 0
+        self.user = user
+        self.channel = channel
+        self.channel_id = channel.id
+        self.guild = channel.guild
+        self.guild_id = bot.GUILD_ID
+        self.message = message
+        self.response = StandInResponse(self)
+        self.followup = StandInFollowup()
+        self.original = None
+
+    async def original_response(self):
+        rest_calls["interaction.original_response"] += 1
+        return self.original
+
+
+class Replayer:
+    def __init__(self, records):
+        self.records = records
+        self.guild = StandInGuild(self)
+        self.users = {}
+        self.channels = {}
+        self.messages = {}        # stand-in message id -> message
+        self.recorded = {}        # recorded message id -> stand-in message
+        self.pending_modals = {}  # user id -> modal waiting for its submit
+        # Bot-created messages are logged in creation order; replaying the same
+        # traffic creates them in the same order.
+        self.created = deque(r["message"] for r in records if r["kind"] == "created")
+        self.latency = defaultdict(list)  # label -> [(ack, settle)]
+        self.skipped = Counter()
+        self.errors = Counter()
+        self.writes = defaultdict(lambda: {"count": 0, "bytes": 0, "seconds": 0.0})
+
+    # The bot reports created messages and reactions through traffic_recorder.
+    def note_created(self, message_id):
+        if self.created:
+            self.recorded[self.created.popleft()] = self.messages[message_id]
+
+    def record_reaction(self, reaction, user):
+        pass
+
+    def record_interaction(self, interaction):
+        pass
+
+    def user(self, user_id, admin=False):
+        if user_id not in self.users:
+            self.users[user_id] = StandInUser(user_id)
+        if admin:
+            bot.allowed_user_ids.add(user_id)
+        return self.users[user_id]
+
+    def channel(self, channel_id):
+        if channel_id not in self.channels:
+            self.channels[channel_id] = StandInChannel(self, channel_id)
+            self.guild.text_channels.append(self.channels[channel_id])
+        return self.channels[channel_id]
+
+    def install(self):
+        bot.bot.get_channel = self.channels.get
+        bot.bot.get_user = self.users.get
+        bot.traffic_recorder = self
+
+        original_save = bot.StateFile.save
+        writes = self.writes
+
+        def counting_save(state, data):
+            start = time.perf_counter()
+            original_save(state, data)
+            stats = writes[state.path]
+            stats["count"] += 1
+            stats["bytes"] += os.path.getsize(state.path)
+            stats["seconds"] += time.perf_counter() - start
+
+        bot.StateFile.save = counting_save
+
+        original_record = bot.VaultAuditLog.record
+
+        def counting_record(log, entry):
+            start = time.perf_counter()
+            entry = original_record(log, entry)
+            stats = writes[log.path]
+            stats["count"] += 1
+            stats["bytes"] += len(json.dumps(entry)) + 1
+            stats["seconds"] += time.perf_counter() - start
+            return entry
+
+        bot.VaultAuditLog.record = counting_record
+
+    def prepare(self, record):
+        """Return (label, zero-argument coroutine function or None)."""
+        kind = record["kind"]
+        user = self.user(record["user"], record.get("admin"))
+        channel = self.channel(record.get("channel") or 0)
+        message = self.recorded.get(record.get("message"))
+        interaction = StandInInteraction(self, user, channel, message)
+
+        if kind == "command":
+            label = f"/{record['name']}"
+            command = bot.bot.tree.get_command(record["name"])
+            if command is None:
+                return label, None
+            choices = {p.name for p in command.parameters if p.choices}
+            kwargs = {}
+            for name, value in record["args"].items():
+                if isinstance(value, dict) and "attachment" in value:
+                    return label, None  # attachment contents aren't recorded
+                if isinstance(value, dict) and "user" in value:
+                    value = self.user(value["user"])
+                elif name in choices:
+                    value = app_commands.Choice(name=str(value), value=value)
+                kwargs[name] = value
+            return label, lambda: command.callback(interaction, **kwargs)
+
+        if kind == "component":
+            label = f"button:{record['custom_id']}"
+            view = bot.event_views.get(message.id) if message else None
+            if view is None or record["custom_id"] not in BUTTONS:
+                return label, None
+            button = getattr(view, BUTTONS[record["custom_id"]])
+            return label, lambda: button.callback(interaction)
+
+        if kind == "modal":
+            modal = self.pending_modals.pop(user.id, None)
+            if modal is None:
+                return "modal", None
+            inputs = [item for item in modal.children if isinstance(item, discord.ui.TextInput)]
+            for item, length in zip(inputs, record["lengths"]):
+                item._value = "x" * length
+            return f"modal:{type(modal).__name__}", lambda: modal.on_submit(interaction)
+
+        if kind == "reaction":
+            label = f"reaction:{record['emoji']}"
+            if message is None:
+                return label, None
+            reaction = SimpleNamespace(message=message, emoji=record["emoji"])
+            return label, lambda: bot.on_reaction_add(reaction, user)
+
+        return kind, None
+
+    async def run(self, speed):
+        self.install()
+        bot.dispatcher.start()
+        bot.vault_log.load(bot.vault)
+
+        started = time.perf_counter()
+        for record in self.records:
+            if record["kind"] == "created":
+                continue
+            if speed:
+                delay = started + record["t"] / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            label, call = self.prepare(record)
+            if call is None:
+                self.skipped[label] += 1
+                continue
+
+            start = time.perf_counter()
+            try:
+                await call()
+            except Exception:
+                self.errors[label] += 1
+                traceback.print_exc()
+            handled = time.perf_counter()
+            await bot.dispatcher.join()
+            self.latency[label].append((handled - start, time.perf_counter() - start))
+        return time.perf_counter() - started
+
+    def report(self, elapsed):
+        def ms(values, q):
+            values = sorted(values)
+            return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+        print(f"Replayed {sum(len(v) for v in self.latency.values())} events in {elapsed:.2f}s\n")
+        print(f"{'handler':32s} {'count':>6s} {'ack p50':>9s} {'ack p95':>9s} {'settle p50':>11s} {'settle p95':>11s} {'max':>9s}")
+        for label, samples in sorted(self.latency.items(), key=lambda item: -len(item[1])):
+            acks = [a for a, _ in samples]
+            settles = [s for _, s in samples]
+            print(
+                f"{label:32s} {len(samples):6d} {ms(acks, 0.5):8.2f}ms {ms(acks, 0.95):8.2f}ms "
+                f"{ms(settles, 0.5):10.2f}ms {ms(settles, 0.95):10.2f}ms {max(settles) * 1000:8.2f}ms"
+            )
+
+        print(f"\nREST calls: {sum(rest_calls.values())}")
+        for endpoint, n in rest_calls.most_common():
+            print(f"  {endpoint:32s} {n:6d}")
+
+        print("\nPersistence:")
+        for path, stats in sorted(self.writes.items()):
+            print(
+                f"  {path:32s} {stats['count']:6d} writes {stats['bytes'] / 1e6:8.2f} MB "
+                f"{stats['seconds'] * 1000:9.1f} ms"
+            )
+
+        for title, counter in (("Skipped", self.skipped), ("Errors", self.errors)):
+            if counter:
+                print(f"\n{title}: " + ", ".join(f"{label} x{n}" for label, n in counter.most_common()))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("recording", help="JSONL file written with RECORD_TRAFFIC_FILE")
+    arg_parser.add_argument("--speed", type=float, default=0, help="1 = recorded pace, 0 = as fast as possible")
+    args = arg_parser.parse_args()
+
+    with open(args.recording) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    records.sort(key=lambda r: r["t"])
+
+    replay = Replayer(records)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        elapsed = asyncio.run(replay.run(args.speed))
+    replay.report(elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,40 @@ from discord.ext import commands
 from discord import app_commands
 from dotenv import load_dotenv
 from dateutil import parser
+from dateutil import tz
+from dateutil.rrule import rrulestr
 import asyncio
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import json
 from discord import File
-from io import StringIO
+from io import StringIO, BytesIO
 import pytz
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from threading import Thread
+import threading
+import sys
 import time
 import traceback
+from typing import Annotated, Literal, Optional
+from typing_extensions import NotRequired, TypedDict
+from pydantic import AfterValidator, BeforeValidator, TypeAdapter, ValidationError
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import hashlib
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib.ticker import MaxNLocator
+import itertools
+import re
+import math
+import heapq
 
 load_dotenv()
 TOKEN = os.getenv("BOT_TOKEN")
@@ -29,6 +53,226 @@ intents.members = True  # Needed for member info
 
 bot = commands.Bot(command_prefix="!", intents=intents)
 
+# ---- Persisted state ----
+# Every JSON file is written as {"version": N, "data": {id: record}} and
+# validated on load by pydantic-core. Schemas are TypedDicts, so validated
+# records are the same plain dicts the rest of the bot already works with.
+#
+# Loading takes the fast path (one validate_json over the raw bytes) when the
+# file is current and clean. Otherwise older versions are migrated step by
+# step, and records that still don't validate are moved to
+# <file>.quarantine.json instead of taking the rest of the file down with
+# them. Writes are atomic and keep the previous file as <file>.bak, which is
+# what we fall back to if the main file is unreadable.
+
+STATE_VERSION = 1
+
+def as_id_list(value):
+    # Older events.json files stored a lone waitlist entry as a bare string.
+    if isinstance(value, (str, int)):
+        return [value]
+    return value
+
+def assume_pacific(value):
+    # Hand-edited files can hold naive times; read them the way /event reads
+    # user input, so comparisons with aware "now" can't raise.
+    if value.tzinfo is None:
+        value = PST.localize(value)
+    return value.astimezone(timezone.utc)
+
+StoredDatetime = Annotated[datetime, AfterValidator(assume_pacific)]
+
+class EventRecord(TypedDict):
+    accepted: dict[int, str]
+    waitlist: Annotated[set[int], BeforeValidator(as_id_list)]
+    max_participants: int
+    title: str
+    event_time: NotRequired[Optional[StoredDatetime]]
+    series_id: NotRequired[Optional[int]]
+    channel_id: NotRequired[Optional[int]]
+    ranked: NotRequired[bool]  # seats are filled by a matchmaking round, not first come
+
+class VaultItem(TypedDict):
+    description: str
+    link: NotRequired[Optional[str]]
+    rarity: NotRequired[str]
+    types: NotRequired[str]
+
+class SeriesRecord(TypedDict):
+    rrule: str
+    dtstart: str
+    title: str
+    description: str
+    roles_to_ping: str
+    max_participants: int
+    image_url: Optional[str]
+    channel_id: int
+    lookahead: int
+    upcoming: list[str]
+    last_occurrence: Optional[str]
+    created_by: int
+
+class HistoryRecord(TypedDict):
+    title: str
+    players: list[str]
+    summary: str
+    ended_by: str
+    player_ids: NotRequired[list[int]]
+    event_time: NotRequired[Optional[StoredDatetime]]
+    finished_at: NotRequired[Optional[StoredDatetime]]
+
+class PollRecord(TypedDict):
+    title: str
+    start: StoredDatetime
+    slot_minutes: int
+    slots: int
+    session_slots: int
+    max_participants: int
+    channel_id: int
+    message_id: Optional[int]
+    created_by: int
+    availability: dict[int, str]  # user_id -> hex of the packed slot bitset
+
+class RankingRecord(TypedDict):
+    events: list[int]  # event message ids, best first
+    character: Optional[str]
+
+class MatchRoundRecord(TypedDict):
+    events: list[int]
+    cutoff: StoredDatetime
+    channel_id: int
+    message_id: Optional[int]
+    created_by: int
+    rankings: dict[int, RankingRecord]
+
+def migrate_v0_to_v1(document):
+    # v0 files were the bare {id: record} mapping with no envelope.
+    return {"version": 1, "data": document}
+
+STATE_MIGRATIONS = {0: migrate_v0_to_v1}
+
+class StateVersionError(Exception):
+    """A state file was written by a newer bot. It is never treated as
+    corruption: loading stops and the file is never overwritten."""
+
+class StateFile:
+    def __init__(self, path, record_type, item_type=None):
+        self.path = path
+        self.record = TypeAdapter(record_type)
+        # For list-valued records (the vault), bad entries are quarantined
+        # one item at a time instead of dropping the whole list.
+        self.item = TypeAdapter(item_type) if item_type else None
+        self.envelope = TypeAdapter(TypedDict(f"{record_type.__name__}File", {
+            "version": Literal[STATE_VERSION],
+            "data": dict[int, record_type],
+        }))
+        self.refused = None  # StateVersionError from load; saving is refused after it
+
+    def load(self):
+        for path in (self.path, self.path + ".bak"):
+            try:
+                with open(path, "rb") as f:
+                    raw = f.read()
+            except FileNotFoundError:
+                continue
+
+            try:
+                return self.envelope.validate_json(raw)["data"]
+            except ValidationError:
+                pass  # old version or bad records, take the slow path
+
+            try:
+                data, bad = self.validate_document(json.loads(raw))
+            except StateVersionError as e:
+                self.refused = e
+                raise
+            except ValueError as e:
+                corrupt = f"{path}.corrupt-{int(time.time())}"
+                suffix = itertools.count(1)
+                while os.path.exists(corrupt):
+                    corrupt = f"{path}.corrupt-{int(time.time())}-{next(suffix)}"
+                os.replace(path, corrupt)
+                print(f"⚠️ {path} is unreadable ({e}); moved to {corrupt}")
+                continue
+
+            if bad:
+                self.quarantine(bad)
+                self.save(data)  # move the bad records out, or every load quarantines them again
+            return data
+        return {}
+
+    def validate_document(self, document):
+        """Migrate a parsed document and validate it record by record.
+
+        Returns (data, bad) where bad maps record keys to the raw record and
+        the validation error. Raises ValueError if the document as a whole is
+        unusable.
+        """
+        if not isinstance(document, dict):
+            raise ValueError("top level is not an object")
+        version = document.get("version", 0) if "data" in document else 0
+        if isinstance(version, int) and version > STATE_VERSION:
+            raise StateVersionError(
+                f"{self.path} is state version {version}, but this bot only understands up to "
+                f"{STATE_VERSION}. Upgrade the bot; the file was left untouched."
+            )
+        while version < STATE_VERSION:
+            document = STATE_MIGRATIONS[version](document)
+            version = document["version"]
+        if version != STATE_VERSION or not isinstance(document.get("data"), dict):
+            raise ValueError(f"unsupported state version {version!r}")
+
+        data = {}
+        bad = {}
+        for key, value in document["data"].items():
+            try:
+                record_id = int(key)
+            except (TypeError, ValueError):
+                bad[str(key)] = {"record": value, "error": "id is not an integer"}
+                continue
+
+            try:
+                data[record_id] = self.record.validate_python(value)
+                continue
+            except ValidationError as e:
+                error = e
+
+            if self.item is not None and isinstance(value, list):
+                data[record_id] = []
+                for i, entry in enumerate(value):
+                    try:
+                        data[record_id].append(self.item.validate_python(entry))
+                    except ValidationError as item_error:
+                        bad[f"{key}[{i}]"] = {"record": entry, "error": str(item_error)}
+            else:
+                bad[str(key)] = {"record": value, "error": str(error)}
+        return data, bad
+
+    def quarantine(self, bad):
+        path = self.path + ".quarantine.json"
+        try:
+            with open(path, "r") as f:
+                existing = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            existing = {}
+        stamp = datetime.now(timezone.utc).isoformat()
+        for key, entry in bad.items():
+            existing[f"{stamp} {key}"] = entry
+        with open(path, "w") as f:
+            json.dump(existing, f, indent=4, default=str)
+        print(f"⚠️ Quarantined {len(bad)} invalid record(s) from {self.path} into {path}")
+
+    def save(self, data):
+        if self.refused is not None:
+            raise self.refused
+        payload = self.envelope.dump_json({"version": STATE_VERSION, "data": data}, indent=4)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(payload)
+        if os.path.exists(self.path):
+            os.replace(self.path, self.path + ".bak")
+        os.replace(tmp, self.path)
+
 # Store signups keyed by message ID
 # accepted: dict user_id -> character description (str)
 # waitlist: set of user_ids
@@ -36,102 +280,322 @@ bot = commands.Bot(command_prefix="!", intents=intents)
 event_signups = {}
 
 EVENTS_FILE = "events.json"
+EVENTS_STATE = StateFile(EVENTS_FILE, EventRecord)
 
 def save_events():
-    def convert(obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()  # Convert datetime to string
-        return obj
-
-    with open(EVENTS_FILE, "w") as f:
-        json.dump(
-            {
-                k: {
-                    **v,
-                    # 🔧 make sure keys are saved as strings
-                    "accepted": {str(uid): desc for uid, desc in v.get("accepted", {}).items()},
-                    "waitlist": list(v.get("waitlist", []))
-                }
-                for k, v in event_signups.items()
-            },
-            f,
-            indent=4,
-            default=convert
-        )
+    EVENTS_STATE.save(event_signups)
 
 
 def load_events():
     global event_signups
-    try:
-        with open(EVENTS_FILE, "r") as f:
-            data = json.load(f)
-            event_signups = {}
-            for k, v in data.items():
-                eid = int(k)
-
-                # Normalize waitlist
-                waitlist = v.get("waitlist", [])
-                if isinstance(waitlist, str):
-                    waitlist = {int(waitlist)}
-                elif isinstance(waitlist, list):
-                    waitlist = {int(x) for x in waitlist}
-                elif isinstance(waitlist, set):
-                    waitlist = waitlist
-                else:
-                    waitlist = set()
-
-                # 🔧 Normalize accepted dict keys back to int
-                accepted = {int(uid): desc for uid, desc in v.get("accepted", {}).items()}
-
-                event_signups[eid] = {
-                    **v,
-                    "waitlist": waitlist,
-                    "accepted": accepted
-                }
-    except (FileNotFoundError, json.JSONDecodeError):
-        event_signups = {}
+    event_signups = EVENTS_STATE.load()
 
 
 vault = {}
 
 VAULT_FILE = "vault.json"
+VAULT_STATE = StateFile(VAULT_FILE, list[VaultItem], item_type=VaultItem)
 
 def save_vault():
     """Save the vault to disk."""
-    with open(VAULT_FILE, "w") as f:
-        json.dump(vault, f, indent=4)
+    VAULT_STATE.save(vault)
 
 
 def load_vault():
     """Load the vault from disk."""
     global vault
-    try:
-        with open(VAULT_FILE, "r") as f:
-            data = json.load(f)
-            # Ensure keys are ints
-            vault = {int(k): v for k, v in data.items()}
-    except (FileNotFoundError, json.JSONDecodeError):
-        vault = {}
-
-def format_accepted(accepted_dict):
-    if not accepted_dict:
-        return "No one yet."
-    lines = []
-    for user_id, char_desc in accepted_dict.items():
-        member = bot.get_user(user_id)
-        name = member.display_name if member else f"<User {user_id}>"
-        lines.append(f"**{name}**: {char_desc}")
-    return "\n".join(lines)
+    vault = VAULT_STATE.load()
+    vault_index.rebuild(vault)
+
+# Ids players see ("Series 3") are handed out from a persisted counter, so
+# ending the newest record never frees its id for the next one.
+ID_COUNTERS_FILE = "id_counters.json"
+ID_COUNTERS_STATE = StateFile(ID_COUNTERS_FILE, int)
+ID_SERIES = 1
+ID_POLL = 2
+ID_MATCH_ROUND = 3
+
+id_counters = {}  # id kind -> last id issued
+
+def load_id_counters():
+    """Load the id counters from disk."""
+    global id_counters
+    id_counters = ID_COUNTERS_STATE.load()
+
+def next_id(kind, existing):
+    """Issue a new id of ``kind``, above every id in ``existing`` and every id issued before."""
+    issued = max(id_counters.get(kind, 0), max(existing, default=0)) + 1
+    id_counters[kind] = issued
+    ID_COUNTERS_STATE.save(id_counters)
+    return issued
+
+# ---- Outbound dispatcher ----
+# Every REST call that is not the interaction ack itself goes through here.
+# Each bucket (a channel, or one interaction's followups) has its own queue
+# and runs one job at a time, since Discord rate limits are keyed on the
+# channel. Workers only ever pick from buckets that are idle, best priority
+# first, so a busy channel never parks a worker, and one worker only takes
+# interaction followups, so a slow reaction cleanup can never hold up a
+# followup the user is waiting on. Waiting out 429s inside a request is
+# left to discord.py's own per-route limiter.
+
+PRIORITY_INTERACTION = 0  # followups to deferred interactions
+PRIORITY_MESSAGE = 1      # user-visible channel messages
+PRIORITY_BACKGROUND = 2   # embed refreshes, reaction cleanup
+
+class OutboundDispatcher:
+    def __init__(self, workers=4):
+        self.workers = workers
+        self.tasks = []
+        self.buckets = {}   # bucket -> heap of (priority, seq, job, coalesce)
+        self.ready = []     # heap of (priority, seq, bucket) for idle buckets
+        self.busy = set()   # buckets with a job running
+        self.pending = {}   # coalesce key -> seq of the newest queued job
+        self.counter = itertools.count()
+        self.unfinished = 0
+        self.wakeup = asyncio.Event()
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+    def start(self):
+        if self.tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self.tasks = [loop.create_task(self._worker(interactive_only=(i == 0))) for i in range(self.workers)]
+
+    def submit(self, priority, bucket, job, coalesce=None):
+        """Queue ``job`` (a zero-argument coroutine function).
+
+        Jobs submitted with the same ``coalesce`` key replace each other while
+        still queued, so a burst of clicks on one event costs a single edit.
+        """
+        seq = next(self.counter)
+        if coalesce is not None:
+            self.pending[coalesce] = seq
+        heapq.heappush(self.buckets.setdefault(bucket, []), (priority, seq, job, coalesce))
+        self.unfinished += 1
+        self.idle.clear()
+        self._mark_ready(bucket)
+
+    async def join(self):
+        """Wait until every queued job has run."""
+        await self.idle.wait()
+
+    def _mark_ready(self, bucket):
+        jobs = self.buckets.get(bucket)
+        if bucket in self.busy or not jobs:
+            return
+        heapq.heappush(self.ready, (jobs[0][0], jobs[0][1], bucket))
+        self.wakeup.set()
+
+    def _finished(self):
+        self.unfinished -= 1
+        if not self.unfinished:
+            self.idle.set()
+
+    def _next(self, interactive_only):
+        while self.ready:
+            priority, seq, bucket = self.ready[0]
+            if interactive_only and priority > PRIORITY_INTERACTION:
+                return None
+            heapq.heappop(self.ready)
+            jobs = self.buckets.get(bucket)
+            if bucket in self.busy or not jobs or jobs[0][1] != seq:
+                continue  # stale entry; the bucket's current head has its own
+            priority, seq, job, coalesce = heapq.heappop(jobs)
+            if not jobs:
+                del self.buckets[bucket]
+            if coalesce is not None:
+                if self.pending.get(coalesce) != seq:
+                    self._finished()  # superseded by a newer job
+                    self._mark_ready(bucket)
+                    continue
+                del self.pending[coalesce]
+            self.busy.add(bucket)
+            return bucket, job
+        return None
+
+    async def _worker(self, interactive_only=False):
+        while True:
+            picked = self._next(interactive_only)
+            if picked is None:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            bucket, job = picked
+            try:
+                await job()
+            except (discord.NotFound, discord.Forbidden):
+                pass  # message or channel went away, nothing left to update
+            except Exception:
+                traceback.print_exc()
+            finally:
+                self.busy.discard(bucket)
+                self._mark_ready(bucket)
+                self._finished()
+
+dispatcher = OutboundDispatcher()
+
+def send_followup(interaction, content, ephemeral=True, **kwargs):
+    dispatcher.submit(
+        PRIORITY_INTERACTION,
+        ("interaction", interaction.id),
+        lambda: interaction.followup.send(content, ephemeral=ephemeral, **kwargs)
+    )
 
-def format_waitlist(waitlist_set):
-    if not waitlist_set:
-        return "No one yet."
-    lines = []
-    for user_id in waitlist_set:
+def queue_event_refresh(channel_id, message_id):
+    """Rebuild the Accepted/Waitlist fields of an event post in the background."""
+    async def refresh():
+        if message_id not in event_signups:
+            return
+        message = await bot.get_channel(channel_id).fetch_message(message_id)
+        embed = message.embeds[0]
+        render_roster(embed, message_id)
+        await message.edit(embed=embed)
+
+    dispatcher.submit(
+        PRIORITY_BACKGROUND,
+        ("channel", channel_id),
+        refresh,
+        coalesce=("event_embed", message_id)
+    )
+
+event_history = {}  # Stores finished events
+
+HISTORY_FILE = "history.json"
+HISTORY_STATE = StateFile(HISTORY_FILE, HistoryRecord)
+
+def save_history():
+    """Save finished adventures to disk."""
+    HISTORY_STATE.save(event_history)
+
+
+def load_history():
+    """Load finished adventures from disk."""
+    global event_history
+    event_history = HISTORY_STATE.load()
+
+# ---- Roster rendering ----
+# Each participant's line is cached with the inputs that produced it, and
+# each section remembers how its lines were packed into field values, so a
+# click re-packs only from the first line that changed; values before it are
+# reused as they are. Spotting that line is still a walk over the roster
+# (one cache lookup and compare per person). Long rosters are split across
+# continuation fields and the embed is kept inside Discord's limits;
+# whatever doesn't fit is summarized as "+N more".
+
+FIELD_VALUE_LIMIT = 1024
+EMBED_FIELD_LIMIT = 25
+EMBED_TOTAL_LIMIT = 6000
+
+class RosterRenderer:
+    def __init__(self):
+        self.lines = {}   # (section, user_id) -> (inputs, rendered line)
+        self.packed = {}  # section -> (lines, values, counts) from the last render
+
+    def line(self, lines, section, user_id, desc=None):
         member = bot.get_user(user_id)
         name = member.display_name if member else f"<User {user_id}>"
-        lines.append(name)
-    return "\n".join(lines)
+        inputs = (name, desc)
+        cached = self.lines.get((section, user_id))
+        if cached is None or cached[0] != inputs:
+            text = f"**{name}**: {desc}" if section == "accepted" else name
+            cached = (inputs, text[:FIELD_VALUE_LIMIT])
+        lines[(section, user_id)] = cached
+        return cached[1]
+
+    def pack(self, section, lines):
+        """Greedily pack lines into field values of at most FIELD_VALUE_LIMIT chars.
+
+        Returns (values, counts), counts[i] being how many people values[i]
+        holds. A line can span several rows of text, so people are counted
+        here rather than from the text.
+        """
+        if not lines:
+            self.packed.pop(section, None)
+            return ["No one yet."], [0]
+
+        old_lines, old_values, old_counts = self.packed.get(section, ([], [], []))
+        if old_lines == lines:
+            return old_values, old_counts
+        same = 0
+        for old, new in zip(old_lines, lines):
+            if old != new:
+                break
+            same += 1
+
+        # A value's end depends on whether the line after it fit, so it is
+        # reusable only if that line is unchanged too.
+        values, counts = [], []
+        start = 0
+        for value, count in zip(old_values, old_counts):
+            if start + count >= same:
+                break
+            values.append(value)
+            counts.append(count)
+            start += count
+
+        current = []
+        size = 0
+        for line in lines[start:]:
+            if current and size + 1 + len(line) > FIELD_VALUE_LIMIT:
+                values.append("\n".join(current))
+                counts.append(len(current))
+                current, size = [], 0
+            size += len(line) + (1 if current else 0)
+            current.append(line)
+        values.append("\n".join(current))
+        counts.append(len(current))
+
+        self.packed[section] = (lines, values, counts)
+        return values, counts
+
+    def fields(self, signups, budget, max_fields):
+        """Return [(name, value, inline)] for the roster within the given limits."""
+        accepted = signups["accepted"]
+        waitlist = signups["waitlist"]
+        max_participants = signups.get("max_participants", 10)
+
+        lines = {}
+        accepted_lines = [self.line(lines, "accepted", uid, desc) for uid, desc in accepted.items()]
+        waitlist_lines = [self.line(lines, "waitlist", uid) for uid in waitlist]
+        sections = [
+            (f"✅ Accepted ({len(accepted)}/{max_participants})", "✅ Accepted (cont.)", *self.pack("accepted", accepted_lines), len(accepted)),
+            ("🕒 Waitlist", "🕒 Waitlist (cont.)", *self.pack("waitlist", waitlist_lines), len(waitlist)),
+        ]
+        self.lines = lines
+
+        inline = all(len(values) == 1 for _, _, values, _, _ in sections)
+        fields = []
+        for title, cont_title, values, counts, people in sections:
+            shown = 0
+            for i, value in enumerate(values):
+                name = title if i == 0 else cont_title
+                # Leave room for a "+N more" field per section
+                if len(fields) + 2 > max_fields or len(name) + len(value) + 80 > budget:
+                    remaining = people - shown
+                    fields.append((cont_title if i else title, f"+{remaining} more", inline))
+                    budget -= len(fields[-1][0]) + len(fields[-1][1])
+                    break
+                fields.append((name, value, inline))
+                budget -= len(name) + len(value)
+                shown += counts[i]
+        return fields
+
+event_renderers = {}  # message_id -> RosterRenderer
+
+def render_roster(embed, message_id):
+    """Replace the roster fields of an event embed, keeping the Time field."""
+    signups = event_signups[message_id]
+    renderer = event_renderers.setdefault(message_id, RosterRenderer())
+
+    time_field = embed.fields[0] if embed.fields else None
+    embed.clear_fields()
+    if time_field is not None:
+        embed.add_field(name=time_field.name, value=time_field.value, inline=False)
+    for name, value, inline in renderer.fields(signups, EMBED_TOTAL_LIMIT - len(embed), EMBED_FIELD_LIMIT - len(embed.fields)):
+        embed.add_field(name=name, value=value, inline=inline)
+    return embed
 
 class JoinModal(discord.ui.Modal):
     def __init__(self, message_id, user_id, max_participants, event_title):
@@ -150,42 +614,29 @@ class JoinModal(discord.ui.Modal):
     )
 
     async def on_submit(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+
         signups = event_signups.get(self.message_id)
         if not signups:
-            await interaction.response.send_message("Event expired or not found.", ephemeral=True)
+            send_followup(interaction, "Event expired or not found.")
             return
 
         accepted = signups["accepted"]
         waitlist = signups["waitlist"]
 
         if self.user_id in accepted:
-            await interaction.response.send_message("You already joined!", ephemeral=True)
+            send_followup(interaction, "You already joined!")
             return
         if self.user_id in waitlist:
-            await interaction.response.send_message("You are on the waitlist. Use Leave to remove yourself first.", ephemeral=True)
+            send_followup(interaction, "You are on the waitlist. Use Leave to remove yourself first.")
             return
 
         if len(accepted) < self.max_participants:
             accepted[self.user_id] = self.character_desc.value
-            channel = bot.get_channel(interaction.channel_id)
-            message = await channel.fetch_message(self.message_id)
-            embed = message.embeds[0]
-            embed.set_field_at(
-                1,
-                name=f"✅ Accepted ({len(accepted)}/{self.max_participants})",
-                value=format_accepted(accepted),
-                inline=True
-            )
-            embed.set_field_at(
-                2,
-                name="🕒 Waitlist",
-                value=format_waitlist(waitlist),
-                inline=True
-            )
-            await message.edit(embed=embed)
-            await interaction.response.send_message("You have joined the event!", ephemeral=True)
+            send_followup(interaction, "You have joined the event!")
+            queue_event_refresh(interaction.channel_id, self.message_id)
         else:
-            await interaction.response.send_message("Sorry, event is full. Use Waitlist button to join waitlist.", ephemeral=True)
+            send_followup(interaction, "Sorry, event is full. Use Waitlist button to join waitlist.")
         save_events()
 
 
@@ -198,6 +649,8 @@ class EventView(discord.ui.View):
 
     @discord.ui.button(label="Join", style=discord.ButtonStyle.success, custom_id="event_join")
     async def join(self, interaction: discord.Interaction, button: discord.ui.Button):
+        # The modal has to be the first response, so this one can't defer.
+        # Everything it needs is already in memory.
         user_id = interaction.user.id
         signups = event_signups.get(self.message_id)
         if not signups:
@@ -210,65 +663,57 @@ class EventView(discord.ui.View):
         if user_id in accepted:
             await interaction.response.send_message("You already joined!", ephemeral=True)
             return
+        if signups.get("ranked"):
+            await interaction.response.send_message(ranked_signup_hint(self.message_id), ephemeral=True)
+            return
         if user_id in waitlist:
             await interaction.response.send_message("You are on the waitlist. Use Leave to remove yourself first.", ephemeral=True)
             return
 
         if len(accepted) < self.max_participants:
-            # Get event title from the embed
-            channel = bot.get_channel(interaction.channel_id)
-            message = await channel.fetch_message(self.message_id)
-            event_title = message.embeds[0].title if message.embeds else "Event"
-
+            event_title = signups.get("title") or self.title or "Event"
             modal = JoinModal(self.message_id, user_id, self.max_participants, event_title)
             await interaction.response.send_modal(modal)
         else:
             await interaction.response.send_message("Sorry, the event is full. Use the Waitlist button to join the waitlist.", ephemeral=True)
-        save_events()
 
     @discord.ui.button(label="Waitlist", style=discord.ButtonStyle.primary, custom_id="event_waitlist")
     async def waitlist(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.defer(ephemeral=True)
+
         user_id = interaction.user.id
         signups = event_signups.get(self.message_id)
         if not signups:
-            await interaction.response.send_message("Event expired or not found.", ephemeral=True)
+            send_followup(interaction, "Event expired or not found.")
             return
 
         accepted = signups["accepted"]
         waitlist = signups["waitlist"]
 
         if user_id in waitlist:
-            await interaction.response.send_message("You are already on the waitlist.", ephemeral=True)
+            send_followup(interaction, "You are already on the waitlist.")
             return
         if user_id in accepted:
-            await interaction.response.send_message("You already joined the event. Use Leave to remove yourself first.", ephemeral=True)
+            send_followup(interaction, "You already joined the event. Use Leave to remove yourself first.")
+            return
+        if signups.get("ranked"):
+            send_followup(interaction, ranked_signup_hint(self.message_id))
             return
 
         waitlist.add(user_id)
 
-        # Update embed message
-        channel = bot.get_channel(interaction.channel_id)
-        message = await channel.fetch_message(self.message_id)
-        embed = message.embeds[0]
-        embed.set_field_at(
-            2,
-            name="🕒 Waitlist",
-            value=format_waitlist(waitlist),
-            inline=True
-        )
-        await message.edit(embed=embed)
-
-        await interaction.response.send_message("You have been added to the waitlist.", ephemeral=True)
+        send_followup(interaction, "You have been added to the waitlist.")
+        queue_event_refresh(interaction.channel_id, self.message_id)
         save_events()
 
     @discord.ui.button(label="Leave", style=discord.ButtonStyle.danger, custom_id="event_leave")
     async def leave(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.defer(ephemeral=True)
+
         user_id = interaction.user.id
         signups = event_signups.get(self.message_id)
-        max_participants = signups.get("max_participants", 10)
-
         if not signups:
-            await interaction.response.send_message("Event expired or not found.", ephemeral=True)
+            send_followup(interaction, "Event expired or not found.")
             return
 
         accepted = signups["accepted"]
@@ -279,35 +724,18 @@ class EventView(discord.ui.View):
         if user_id in accepted:
             del accepted[user_id]
             changed = True
-            # Promote first in waitlist if any
+            # Promote whoever on the waitlist has played least lately
             if waitlist:
-                promoted = waitlist.pop()
-                accepted[promoted] = "No description provided."
+                promote_from_waitlist(signups)
         elif user_id in waitlist:
             waitlist.remove(user_id)
             changed = True
 
         if changed:
-            # Update embed message
-            channel = bot.get_channel(interaction.channel_id)
-            message = await channel.fetch_message(self.message_id)
-            embed = message.embeds[0]
-            embed.set_field_at(
-                1,
-                name=f"✅ Accepted ({len(accepted)}/{max_participants})",
-                value=format_accepted(accepted),
-                inline=True
-            )
-            embed.set_field_at(
-                2,
-                name="🕒 Waitlist",
-                value=format_waitlist(waitlist),
-                inline=True
-            )
-            await message.edit(embed=embed)
-            await interaction.response.send_message("You have left the event.", ephemeral=True)
+            send_followup(interaction, "You have left the event.")
+            queue_event_refresh(interaction.channel_id, self.message_id)
         else:
-            await interaction.response.send_message("You are not in the event or waitlist.", ephemeral=True)
+            send_followup(interaction, "You are not in the event or waitlist.")
         save_events()
 
     @discord.ui.button(label="🔚", style=discord.ButtonStyle.secondary, custom_id="event_finish")
@@ -318,18 +746,9 @@ class EventView(discord.ui.View):
             return
 
         await interaction.response.send_modal(FinishAdventureModal(self))
-        save_events()
 
     async def update_message(self, interaction: discord.Interaction):
-        data = event_signups[self.message_id]
-        embed = interaction.message.embeds[0]
-
-        accepted_list = "\n".join(data["accepted"].values()) if data["accepted"] else "No one yet."
-        waitlist_list = "\n".join(data["waitlist"]) if data["waitlist"] else "No one yet."
-
-        embed.set_field_at(1, name=f"✅ Accepted ({len(data['accepted'])}/{self.max_participants})", value=accepted_list, inline=True)
-        embed.set_field_at(2, name="🕒 Waitlist", value=waitlist_list, inline=True)
-
+        embed = render_roster(interaction.message.embeds[0], self.message_id)
         await interaction.message.edit(embed=embed, view=self)
         save_events()
 
@@ -347,12 +766,22 @@ class FinishAdventureModal(discord.ui.Modal, title="Finish Adventure"):
         self.add_item(self.description_input)
 
     async def on_submit(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+
         message_data = event_signups.get(self.view.message_id)
         if not message_data:
-            await interaction.response.send_message("Event data not found.", ephemeral=True)
+            send_followup(interaction, "Event data not found.")
             return
 
-        accepted_players = list(message_data["accepted"].values())
+        # Save to history and remove from active events
+        entry = archive_event(
+            self.view.message_id,
+            self.description_input.value or "No story provided.",
+            interaction.user.display_name
+        )
+        save_history()
+
+        accepted_players = entry["players"]
         if not accepted_players:
             players_list = "No players joined this adventure."
         else:
@@ -360,35 +789,28 @@ class FinishAdventureModal(discord.ui.Modal, title="Finish Adventure"):
 
         finish_embed = discord.Embed(
             title=f"🏆 Adventure Finished: {self.view.title}",
-            description=f"**Adventurers:**\n{players_list}\n\n**Summary:**\n{self.description_input.value or 'No story provided.'}",
+            description=f"**Adventurers:**\n{players_list}\n\n**Summary:**\n{entry['summary']}",
             color=discord.Color.gold()
         )
         finish_embed.set_footer(text=f"Event ended by {interaction.user.display_name}")
 
-        await interaction.channel.send(embed=finish_embed)
+        send_followup(interaction, "Adventure finished and archived!")
 
-        # Save to history
-        event_history[self.view.message_id] = {
-            "title": self.view.title,
-            "players": accepted_players,
-            "summary": self.description_input.value or "No story provided.",
-            "ended_by": interaction.user.display_name
-        }
+        channel = interaction.channel
+        dispatcher.submit(
+            PRIORITY_MESSAGE,
+            ("channel", channel.id),
+            lambda: channel.send(embed=finish_embed)
+        )
 
         # Disable all buttons
-        for child in self.view.children:
-            child.disabled = True
-        await self.view.message.edit(view=self.view)
-
-        # Remove from active events
-        event_signups.pop(self.view.message_id, None)
-
-        await interaction.response.send_message("Adventure finished and archived!", ephemeral=True)
+        event_views.setdefault(self.view.message_id, self.view)
+        retire_event_view(self.view.message_id, channel.id)
         save_events()
 
 # Event tracking
 event_signups = {}
-event_history = {}  # Stores finished events
+event_views = {}  # message_id -> registered EventView, so retired events can be unregistered
 allowed_user_ids = {284137393483939841, 261651766213345282}  # Replace with actual Discord user IDs
 
 async def schedule_event_reminder(message_id: int):
@@ -457,7 +879,8 @@ PST = pytz.timezone("America/Los_Angeles")
     time="Date and time for the event in ISO 8601 format, YYYY-MM-DDTHH:MM:SS",
     roles_to_ping="Roles to ping (mention them here)",
     max_participants="Maximum number of participants allowed",
-    image_url="Optional URL of an image to display below description"
+    image_url="Optional URL of an image to display below description",
+    ranked_signup="Fill seats from players' ranked preferences in a /matchround instead of first come"
 )
 async def event(
     interaction: discord.Interaction,
@@ -466,7 +889,8 @@ async def event(
     time: str,
     roles_to_ping: str,
     max_participants: int,
-    image_url: str = None
+    image_url: str = None,
+    ranked_signup: bool = False
 ):
     if interaction.user.id not in allowed_user_ids:
         await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
@@ -486,6 +910,72 @@ async def event(
         )
         return
 
+    embed = build_event_embed(title, description, utc_time, max_participants, image_url)
+    footer = f"Created by {interaction.user.display_name}"
+    if ranked_signup:
+        footer += " • Ranked signup, see /matchround"
+    embed.set_footer(text=footer)
+
+    await interaction.response.send_message(
+        content=roles_to_ping,
+        embed=embed,
+        allowed_mentions=discord.AllowedMentions(roles=True)
+    )
+
+    message = await interaction.original_response()
+    register_event(message, max_participants, utc_time, title, ranked=ranked_signup)
+    save_events()
+
+# ---- Recurring events ----
+# A series is stored as its RRULE plus a cursor, never as expanded
+# instances. The scheduler posts occurrences as they enter the lookahead
+# window, so at most `lookahead` signup posts exist per series at a time.
+
+SERIES_FILE = "series.json"
+SERIES_TZ = tz.gettz("America/Los_Angeles")  # keeps wall-clock time across DST
+SERIES_POLL_SECONDS = 15 * 60
+
+event_series = {}  # series_id -> definition, see create_series
+series_task = None
+
+SERIES_STATE = StateFile(SERIES_FILE, SeriesRecord)
+
+def save_series():
+    """Save series definitions to disk."""
+    SERIES_STATE.save(event_series)
+
+
+def load_series():
+    """Load series definitions from disk."""
+    global event_series
+    event_series = SERIES_STATE.load()
+
+def series_rule(series):
+    dtstart = parser.isoparse(series["dtstart"]).astimezone(SERIES_TZ)
+    return rrulestr(series["rrule"], dtstart=dtstart)
+
+def due_occurrences(series, now):
+    """Return the occurrences that should be posted now, oldest first.
+
+    Occurrences that passed while the bot was offline are skipped rather than
+    posted late.
+    """
+    rule = series_rule(series)
+    upcoming = [t for t in series["upcoming"] if parser.isoparse(t) > now]
+    cursor = now
+    if series.get("last_occurrence"):
+        cursor = max(cursor, parser.isoparse(series["last_occurrence"]))
+
+    due = []
+    while len(upcoming) + len(due) < series["lookahead"]:
+        occurrence = rule.after(cursor)
+        if occurrence is None:
+            break  # rule exhausted (COUNT/UNTIL)
+        due.append(occurrence.astimezone(timezone.utc))
+        cursor = occurrence
+    return due
+
+def build_event_embed(title, description, utc_time, max_participants, image_url=None):
     embed_time_str = f"<t:{int(utc_time.timestamp())}:F>"
 
     embed = discord.Embed(
@@ -498,28 +988,807 @@ async def event(
         embed.set_image(url=image_url)
     embed.add_field(name=f"✅ Accepted (0/{max_participants})", value="No one yet.", inline=True)
     embed.add_field(name="🕒 Waitlist", value="No one yet.", inline=True)
-    embed.set_footer(text=f"Created by {interaction.user.display_name}")
-
-    await interaction.response.send_message(
-        content=roles_to_ping,
-        embed=embed,
-        allowed_mentions=discord.AllowedMentions(roles=True)
-    )
-
-    message = await interaction.original_response()
+    return embed
 
+def register_event(message, max_participants, utc_time, title, series_id=None, ranked=False):
+    """Start tracking signups for a freshly posted event message."""
     event_signups[message.id] = {
         "accepted": {},
         "waitlist": set(),
         "max_participants": max_participants,
         "event_time": utc_time,
-        "title": title
+        "title": title,
+        "channel_id": message.channel.id
     }
+    if series_id is not None:
+        event_signups[message.id]["series_id"] = series_id
+    if ranked:
+        event_signups[message.id]["ranked"] = True
 
     view = EventView(message.id, max_participants, title)
     view.message = message  # Store reference to original message
-    await message.edit(view=view)
+    event_views[message.id] = view
+    if traffic_recorder:
+        traffic_recorder.note_created(message.id)
+    dispatcher.submit(
+        PRIORITY_MESSAGE,
+        ("channel", message.channel.id),
+        lambda: message.edit(view=view)
+    )
+
+async def materialize_series(series_id, now=None):
+    series = event_series.get(series_id)
+    if not series:
+        return 0
+    now = now or datetime.now(timezone.utc)
+    channel = bot.get_channel(series["channel_id"])
+    if channel is None:
+        return 0
+
+    due = due_occurrences(series, now)
+    series["upcoming"] = [t for t in series["upcoming"] if parser.isoparse(t) > now]
+    for utc_time in due:
+        embed = build_event_embed(
+            series["title"], series["description"], utc_time,
+            series["max_participants"], series.get("image_url")
+        )
+        embed.set_footer(text=f"Recurring event • Series {series_id}")
+        message = await channel.send(
+            content=series["roles_to_ping"],
+            embed=embed,
+            allowed_mentions=discord.AllowedMentions(roles=True)
+        )
+        register_event(message, series["max_participants"], utc_time, series["title"], series_id)
+        series["upcoming"].append(utc_time.isoformat())
+        series["last_occurrence"] = utc_time.isoformat()
+
+    if due:
+        save_events()
+    save_series()
+    return len(due)
+
+async def series_scheduler():
+    while True:
+        for series_id in list(event_series):
+            try:
+                await materialize_series(series_id)
+            except Exception:
+                traceback.print_exc()
+        await asyncio.sleep(SERIES_POLL_SECONDS)
+
+@bot.tree.command(name="eventseries", description="Create a recurring event from an RRULE")
+@app_commands.describe(
+    title="Title of the recurring event",
+    description="Description for each session",
+    start="First session in ISO 8601 format, YYYY-MM-DDTHH:MM:SS (Pacific time if no offset)",
+    rrule="Recurrence rule, e.g. FREQ=WEEKLY;BYDAY=FR or FREQ=WEEKLY;INTERVAL=2;COUNT=10",
+    roles_to_ping="Roles to ping (mention them here)",
+    max_participants="Maximum number of participants allowed",
+    lookahead="How many upcoming sessions to keep posted (default 1)",
+    image_url="Optional URL of an image to display below description"
+)
+async def eventseries(
+    interaction: discord.Interaction,
+    title: str,
+    description: str,
+    start: str,
+    rrule: str,
+    roles_to_ping: str,
+    max_participants: int,
+    lookahead: app_commands.Range[int, 1, 10] = 1,
+    image_url: str = None
+):
+    if interaction.user.id not in allowed_user_ids:
+        await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+        return
+
+    try:
+        dtstart = parser.isoparse(start)
+        if dtstart.tzinfo is None:
+            dtstart = dtstart.replace(tzinfo=SERIES_TZ)
+        series = {
+            "rrule": rrule.upper().removeprefix("RRULE:"),
+            "dtstart": dtstart.isoformat(),
+        }
+        series_rule(series)
+    except Exception:
+        await interaction.response.send_message(
+            "Invalid start time or RRULE. Use ISO8601 for the start and e.g. FREQ=WEEKLY;BYDAY=FR for the rule.",
+            ephemeral=True
+        )
+        return
+
+    await interaction.response.defer(ephemeral=True)
+
+    series_id = next_id(ID_SERIES, event_series)
+    series.update({
+        "title": title,
+        "description": description,
+        "roles_to_ping": roles_to_ping,
+        "max_participants": max_participants,
+        "image_url": image_url,
+        "channel_id": interaction.channel_id,
+        "lookahead": lookahead,
+        "upcoming": [],
+        "last_occurrence": None,
+        "created_by": interaction.user.id
+    })
+    event_series[series_id] = series
+
+    # Start from just before dtstart so a future first session is included.
+    posted = await materialize_series(series_id, now=min(datetime.now(timezone.utc), dtstart - timedelta(seconds=1)))
+    send_followup(interaction, f"Series {series_id} created. Posted {posted} upcoming session(s).")
+
+@bot.tree.command(name="endseries", description="Stop a recurring event from posting new sessions")
+@app_commands.describe(series_id="ID shown in the footer of the series posts")
+async def endseries(interaction: discord.Interaction, series_id: int):
+    if interaction.user.id not in allowed_user_ids:
+        await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+        return
+
+    series = event_series.pop(series_id, None)
+    if not series:
+        await interaction.response.send_message(f"No series with ID {series_id}.", ephemeral=True)
+        return
+
+    save_series()
+    await interaction.response.send_message(
+        f"Series {series_id} (**{series['title']}**) ended. Already posted sessions stay open.",
+        ephemeral=True
+    )
+
+# ---- Availability polls ----
+# A poll covers a window cut into fixed slots. Each player's availability is
+# one bitset over those slots, stored packed (np.packbits) as hex. Ranking
+# unpacks them into a players x slots matrix and finds, for every possible
+# session start, how many players are free for the whole session using a
+# cumulative sum, so it stays instant for weeks of slots.
+
+POLLS_FILE = "polls.json"
+POLLS_STATE = StateFile(POLLS_FILE, PollRecord)
+POLL_RESULTS_SHOWN = 5
+WEEKDAYS = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+AVAILABILITY_RANGE = re.compile(r"^\s*(\w+|\d{4}-\d{2}-\d{2})\s+(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*$")
+
+availability_polls = {}  # poll_id -> PollRecord
+
+def save_polls():
+    """Save availability polls to disk."""
+    POLLS_STATE.save(availability_polls)
+
+
+def load_polls():
+    """Load availability polls from disk."""
+    global availability_polls
+    availability_polls = POLLS_STATE.load()
+
+def slot_time(poll, index):
+    return poll["start"] + timedelta(minutes=poll["slot_minutes"] * int(index))
+
+def pacific_time(date, hour, minute):
+    """Aware datetime for a Pacific wall-clock time; 24:00 is the next midnight."""
+    if hour == 24:
+        date, hour = date + timedelta(days=1), 0
+    return PST.localize(datetime.combine(date, datetime.min.time().replace(hour=hour, minute=minute)))
+
+def parse_availability(poll, text):
+    """Turn "Fri 18:00-23:00, 2026-10-25 12:00-16:00" into a bool array over the poll's slots.
+
+    Weekday names apply to every matching day in the window. Times are
+    Pacific; an end at or before the start runs past midnight.
+    """
+    free = np.zeros(poll["slots"], dtype=bool)
+    start_local = poll["start"].astimezone(PST)
+    days = (poll["slots"] * poll["slot_minutes"]) // (24 * 60) + 2
+    slot_seconds = poll["slot_minutes"] * 60
+
+    for part in text.split(","):
+        match = AVAILABILITY_RANGE.match(part)
+        if not match:
+            raise ValueError(f"Couldn't read '{part.strip()}'. Use e.g. 'Fri 18:00-23:00' or '2026-10-25 12:00-16:00'.")
+        day, h1, m1, h2, m2 = match.groups()
+        h1, m1, h2, m2 = int(h1), int(m1), int(h2), int(m2)
+        if any(h > 24 or m > 59 or (h == 24 and m) for h, m in ((h1, m1), (h2, m2))):
+            raise ValueError(f"Couldn't read '{part.strip()}'. Times run from 00:00 to 24:00.")
+        if day.lower()[:3] in WEEKDAYS:
+            dates = [
+                (start_local + timedelta(days=offset)).date()
+                for offset in range(-1, days)
+                if (start_local + timedelta(days=offset)).weekday() == WEEKDAYS[day.lower()[:3]]
+            ]
+        else:
+            dates = [datetime.strptime(day, "%Y-%m-%d").date()]
+
+        for date in dates:
+            begin = pacific_time(date, h1, m1)
+            end = pacific_time(date, h2, m2)
+            if end <= begin:
+                end = pacific_time(date + timedelta(days=1), h2, m2)
+            first = int(np.ceil((begin - poll["start"]).total_seconds() / slot_seconds))
+            last = int((end - poll["start"]).total_seconds() // slot_seconds)
+            free[max(first, 0):min(max(last, 0), poll["slots"])] = True
+    return free
+
+def availability_matrix(poll):
+    """Return (user_ids, players x slots uint8 matrix)."""
+    user_ids = list(poll["availability"])
+    if not user_ids:
+        return user_ids, np.zeros((0, poll["slots"]), dtype=np.uint8)
+    packed = np.frombuffer(b"".join(bytes.fromhex(poll["availability"][uid]) for uid in user_ids), dtype=np.uint8)
+    matrix = np.unpackbits(packed.reshape(len(user_ids), -1), axis=1, count=poll["slots"])
+    return user_ids, matrix
+
+def rank_slots(poll, top=POLL_RESULTS_SHOWN):
+    """Best non-overlapping session starts as [(slot index, [free user ids])]."""
+    user_ids, matrix = availability_matrix(poll)
+    length = poll["session_slots"]
+    if not user_ids or length > poll["slots"]:
+        return []
+
+    # free[p, s] is True when player p is free for every slot of a session starting at s
+    running = np.zeros((matrix.shape[0], matrix.shape[1] + 1), dtype=np.int32)
+    np.cumsum(matrix, axis=1, out=running[:, 1:])
+    free = (running[:, length:] - running[:, :-length]) == length
+    counts = free.sum(axis=0)
+
+    # Most players first (so slots meeting quorum lead), earliest on ties
+    order = np.lexsort((np.arange(len(counts)), -counts))
+    chosen = []
+    for start in order:
+        if counts[start] == 0 or len(chosen) >= top:
+            break
+        if any(abs(int(start) - other) < length for other, _ in chosen):
+            continue
+        chosen.append((int(start), [user_ids[i] for i in np.flatnonzero(free[:, start])]))
+    return chosen
+
+def poll_embed(poll_id, poll):
+    end = slot_time(poll, poll["slots"])
+    embed = discord.Embed(
+        title=f"📅 {poll['title']}",
+        description=(
+            f"When can you play? Window: <t:{int(poll['start'].timestamp())}:f> – <t:{int(end.timestamp())}:f>\n"
+            f"Sessions are {poll['session_slots'] * poll['slot_minutes'] / 60:g}h, "
+            f"{poll['max_participants']} players needed.\n\n"
+            f"Mark your times with `/available poll:{poll_id} times:Fri 18:00-23:00, Sat 12:00-20:00` (Pacific)."
+        ),
+        color=discord.Color.teal()
+    )
+    ranked = rank_slots(poll, top=3)
+    value = "\n".join(
+        f"{'✅' if len(players) >= poll['max_participants'] else '▫️'} <t:{int(slot_time(poll, start).timestamp())}:f> — {len(players)} free"
+        for start, players in ranked
+    ) or "No availability yet."
+    embed.add_field(name="Best times so far", value=value, inline=False)
+    embed.set_footer(text=f"Poll {poll_id} • {len(poll['availability'])} responded")
+    return embed
+
+def queue_poll_refresh(poll_id):
+    poll = availability_polls.get(poll_id)
+    if not poll or not poll.get("message_id"):
+        return
+
+    async def refresh():
+        current = availability_polls.get(poll_id)
+        if not current:
+            return
+        message = bot.get_channel(current["channel_id"]).get_partial_message(current["message_id"])
+        await message.edit(embed=poll_embed(poll_id, current))
+
+    dispatcher.submit(
+        PRIORITY_BACKGROUND,
+        ("channel", poll["channel_id"]),
+        refresh,
+        coalesce=("poll_embed", poll_id)
+    )
+
+@bot.tree.command(name="poll", description="Start an availability poll to find the best session time")
+@app_commands.describe(
+    title="What the session is for",
+    start="Start of the window in ISO 8601 format, YYYY-MM-DDTHH:MM:SS (Pacific time if no offset)",
+    days="How many days the window covers",
+    session_hours="How long a session runs",
+    max_participants="Players needed for the session to go ahead",
+    slot_minutes="Slot size in minutes (default 30)"
+)
+async def poll(
+    interaction: discord.Interaction,
+    title: str,
+    start: str,
+    days: app_commands.Range[int, 1, 42],
+    session_hours: app_commands.Range[float, 0.5, 24.0],
+    max_participants: int,
+    slot_minutes: app_commands.Range[int, 15, 240] = 30
+):
+    if interaction.user.id not in allowed_user_ids:
+        await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+        return
+
+    try:
+        parsed_time = parser.isoparse(start)
+        if parsed_time.tzinfo is None:
+            parsed_time = PST.localize(parsed_time)
+    except Exception:
+        await interaction.response.send_message(
+            "Invalid time format. Use ISO8601 (YYYY-MM-DDTHH:MM:SS).",
+            ephemeral=True
+        )
+        return
+
+    poll_id = next_id(ID_POLL, availability_polls)
+    new_poll = {
+        "title": title,
+        "start": parsed_time.astimezone(timezone.utc),
+        "slot_minutes": slot_minutes,
+        "slots": days * 24 * 60 // slot_minutes,
+        "session_slots": max(1, int(round(session_hours * 60 / slot_minutes))),
+        "max_participants": max_participants,
+        "channel_id": interaction.channel_id,
+        "message_id": None,
+        "created_by": interaction.user.id,
+        "availability": {}
+    }
+    availability_polls[poll_id] = new_poll
+
+    await interaction.response.send_message(embed=poll_embed(poll_id, new_poll))
+    message = await interaction.original_response()
+    new_poll["message_id"] = message.id
+    save_polls()
+
+@bot.tree.command(name="available", description="Mark when you're free for an availability poll")
+@app_commands.describe(
+    poll="Poll ID from the poll's footer",
+    times="Comma-separated ranges, e.g. 'Fri 18:00-23:00, 2026-10-25 12:00-16:00' (Pacific), or 'clear'"
+)
+async def available(interaction: discord.Interaction, poll: int, times: str):
+    current = availability_polls.get(poll)
+    if not current:
+        await interaction.response.send_message(f"No poll with ID {poll}.", ephemeral=True)
+        return
+
+    if times.strip().lower() == "clear":
+        current["availability"].pop(interaction.user.id, None)
+        free_slots = 0
+    else:
+        try:
+            free = parse_availability(current, times)
+        except ValueError as e:
+            await interaction.response.send_message(str(e), ephemeral=True)
+            return
+        current["availability"][interaction.user.id] = np.packbits(free).tobytes().hex()
+        free_slots = int(free.sum())
+
+    save_polls()
+    hours = free_slots * current["slot_minutes"] / 60
+    await interaction.response.send_message(f"Saved: you're free for {hours:g} hour(s) of this poll.", ephemeral=True)
+    queue_poll_refresh(poll)
+
+@bot.tree.command(name="pollresults", description="Rank the best session times for an availability poll")
+@app_commands.describe(poll="Poll ID from the poll's footer")
+async def pollresults(interaction: discord.Interaction, poll: int):
+    current = availability_polls.get(poll)
+    if not current:
+        await interaction.response.send_message(f"No poll with ID {poll}.", ephemeral=True)
+        return
+
+    ranked = rank_slots(current)
+    embed = discord.Embed(
+        title=f"📅 {current['title']} — best times",
+        color=discord.Color.teal()
+    )
+    if not ranked:
+        embed.description = "No one is free for a full session yet."
+    for rank, (start, players) in enumerate(ranked, 1):
+        quorum = "✅ quorum" if len(players) >= current["max_participants"] else f"needs {current['max_participants'] - len(players)} more"
+        embed.add_field(
+            name=f"#{rank} — {len(players)}/{len(current['availability'])} free, {quorum}",
+            value=f"<t:{int(slot_time(current, start).timestamp())}:F>\n" + ", ".join(display_name(uid) for uid in players)[:900],
+            inline=False
+        )
+    embed.set_footer(text=f"Use /pollclose poll:{poll} rank:<n> to turn a time into an event")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="pollclose", description="Close an availability poll and create the event at a ranked time")
+@app_commands.describe(
+    poll="Poll ID from the poll's footer",
+    description="Description for the event",
+    roles_to_ping="Roles to ping (mention them here)",
+    rank="Which ranked time to use (default: the best)",
+    image_url="Optional URL of an image to display below description"
+)
+async def pollclose(
+    interaction: discord.Interaction,
+    poll: int,
+    description: str,
+    roles_to_ping: str,
+    rank: app_commands.Range[int, 1, POLL_RESULTS_SHOWN] = 1,
+    image_url: str = None
+):
+    if interaction.user.id not in allowed_user_ids:
+        await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+        return
+
+    current = availability_polls.get(poll)
+    if not current:
+        await interaction.response.send_message(f"No poll with ID {poll}.", ephemeral=True)
+        return
+    ranked = rank_slots(current)
+    if len(ranked) < rank:
+        await interaction.response.send_message("There is no session time at that rank yet.", ephemeral=True)
+        return
+
+    utc_time = slot_time(current, ranked[rank - 1][0])
+    embed = build_event_embed(current["title"], description, utc_time, current["max_participants"], image_url)
+    embed.set_footer(text=f"Created by {interaction.user.display_name} from poll {poll}")
+
+    await interaction.response.send_message(
+        content=roles_to_ping,
+        embed=embed,
+        allowed_mentions=discord.AllowedMentions(roles=True)
+    )
+    message = await interaction.original_response()
+    register_event(message, current["max_participants"], utc_time, current["title"])
+    save_events()
+
+    availability_polls.pop(poll, None)
+    save_polls()
+    if current.get("message_id"):
+        poll_message = bot.get_channel(current["channel_id"]).get_partial_message(current["message_id"])
+        closed = poll_embed(poll, current)
+        closed.set_footer(text=f"Poll {poll} • closed")
+        dispatcher.submit(PRIORITY_BACKGROUND, ("channel", current["channel_id"]), lambda: poll_message.edit(embed=closed))
+
+# ---- Matchmaking ----
+# Events created with ranked_signup don't fill first come. An admin opens a
+# round over the open ranked events, players rank the ones they'd play, and
+# at the cutoff every seat is assigned at once. The assignment is a min-cost
+# flow (source -> player -> event -> sink): each player/event edge is worth
+# the player's rank score plus a bonus for having played less lately, and
+# successive shortest paths keep seating players while that raises the total,
+# moving already seated players to other choices where it helps.
+
+MATCH_ROUNDS_FILE = "match_rounds.json"
+MATCH_ROUNDS_STATE = StateFile(MATCH_ROUNDS_FILE, MatchRoundRecord)
+RANK_SCORES = (100, 60, 35, 20, 10)  # 1st choice, 2nd, ...; later choices score 5
+ATTENDANCE_BONUS = 40                # split by 1 + sessions played in the window
+ATTENDANCE_WINDOW = timedelta(days=90)
+
+match_rounds = {}       # round_id -> MatchRoundRecord
+match_round_tasks = {}  # round_id -> task waiting for the cutoff
+
+def save_match_rounds():
+    """Save open matchmaking rounds to disk."""
+    MATCH_ROUNDS_STATE.save(match_rounds)
+
+
+def load_match_rounds():
+    """Load open matchmaking rounds from disk."""
+    global match_rounds
+    match_rounds = MATCH_ROUNDS_STATE.load()
+
+def recent_attendance(now=None):
+    """Sessions per player: finished ones inside the window plus seats held in open events."""
+    since = (now or datetime.now(timezone.utc)) - ATTENDANCE_WINDOW
+    played = {}
+    for entry in event_history.values():
+        finished = entry.get("finished_at") or entry.get("event_time")
+        if finished and finished < since:
+            continue
+        for user_id in entry.get("player_ids", []):
+            played[user_id] = played.get(user_id, 0) + 1
+    for data in event_signups.values():
+        for user_id in data["accepted"]:
+            played[user_id] = played.get(user_id, 0) + 1
+    return played
+
+def promote_from_waitlist(signups):
+    """Move the waitlisted player with the fewest recent sessions into the event."""
+    played = recent_attendance()
+    promoted = min(signups["waitlist"], key=lambda user_id: (played.get(user_id, 0), user_id))
+    signups["waitlist"].remove(promoted)
+    signups["accepted"][promoted] = "No description provided."
+    return promoted
+
+def assign_parties(rankings, seats, attendance):
+    """Seat players so total satisfaction is as high as possible.
+
+    rankings maps user id -> event ids, best first; seats maps event id ->
+    open seats; attendance maps user id -> recent sessions. Returns
+    {user id: event id} for everyone who got a seat.
+    """
+    events = [event_id for event_id, open_seats in seats.items() if open_seats > 0]
+    users = [user_id for user_id, ranked in rankings.items() if any(seats.get(e, 0) > 0 for e in ranked)]
+    source, sink = 0, 1
+    user_node = {user_id: 2 + i for i, user_id in enumerate(users)}
+    event_node = {event_id: 2 + len(users) + i for i, event_id in enumerate(events)}
+    size = 2 + len(users) + len(events)
+
+    # Edge i runs to[i] with cap[i] left; its residual twin is i ^ 1.
+    graph = [[] for _ in range(size)]
+    to, cap, cost = [], [], []
+
+    def add_edge(a, b, capacity, weight):
+        for node, target, c, w in ((a, b, capacity, weight), (b, a, 0, -weight)):
+            graph[node].append(len(to))
+            to.append(target)
+            cap.append(c)
+            cost.append(w)
+
+    for user_id in users:
+        add_edge(source, user_node[user_id], 1, 0)
+        bonus = ATTENDANCE_BONUS // (1 + attendance.get(user_id, 0))
+        for rank, event_id in enumerate(rankings[user_id]):
+            if event_id in event_node:
+                score = RANK_SCORES[rank] if rank < len(RANK_SCORES) else 5
+                add_edge(user_node[user_id], event_node[event_id], 1, -(score + bonus))
+    for event_id in events:
+        add_edge(event_node[event_id], sink, seats[event_id], 0)
+
+    while True:
+        # Shortest (most valuable) augmenting path; residual costs can be
+        # negative, so Bellman-Ford with a queue rather than Dijkstra.
+        dist = [math.inf] * size
+        via = [-1] * size
+        queued = [False] * size
+        dist[source] = 0
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            queued[node] = False
+            for edge in graph[node]:
+                target = to[edge]
+                if cap[edge] and dist[node] + cost[edge] < dist[target]:
+                    dist[target] = dist[node] + cost[edge]
+                    via[target] = edge
+                    if not queued[target]:
+                        queued[target] = True
+                        queue.append(target)
+        if dist[sink] >= 0:
+            break  # no path left that adds satisfaction
+        node = sink
+        while node != source:
+            edge = via[node]
+            cap[edge] -= 1
+            cap[edge ^ 1] += 1
+            node = to[edge ^ 1]
+
+    event_at = {node: event_id for event_id, node in event_node.items()}
+    assignment = {}
+    for user_id in users:
+        for edge in graph[user_node[user_id]]:
+            if to[edge] in event_at and not cap[edge] and not edge & 1:
+                assignment[user_id] = event_at[to[edge]]
+    return assignment
+
+def ranked_signup_hint(message_id):
+    for round_id, current in match_rounds.items():
+        if message_id in current["events"]:
+            return f"Seats for this session are matched. Rank it with `/rankevents round:{round_id}` before <t:{int(current['cutoff'].timestamp())}:f>."
+    return "Seats for this session are matched. Rank it with /rankevents once a matchmaking round is posted."
+
+def match_round_embed(round_id, current):
+    embed = discord.Embed(
+        title="🎲 Matchmaking round",
+        description=(
+            f"Rank the sessions you'd play, best first, e.g. `/rankevents round:{round_id} choices:2,1,3`.\n"
+            f"Seats are assigned <t:{int(current['cutoff'].timestamp())}:R>; "
+            f"players who have played less lately get priority on contested seats."
+        ),
+        color=discord.Color.purple()
+    )
+    lines = []
+    for number, event_id in enumerate(current["events"], 1):
+        data = event_signups.get(event_id)
+        if data is None:
+            lines.append(f"**{number}.** ~~ended~~")
+            continue
+        open_seats = max(0, data["max_participants"] - len(data["accepted"]))
+        first_picks = sum(1 for r in current["rankings"].values() if r["events"][:1] == [event_id])
+        when = f"<t:{int(data['event_time'].timestamp())}:f>" if data.get("event_time") else "TBD"
+        lines.append(f"**{number}. {data['title']}** — {when} — {open_seats} seat(s), {first_picks} first pick(s)")
+    embed.add_field(name="Sessions", value="\n".join(lines)[:FIELD_VALUE_LIMIT] or "None", inline=False)
+    embed.set_footer(text=f"Round {round_id} • {len(current['rankings'])} ranked")
+    return embed
+
+def queue_match_round_refresh(round_id):
+    current = match_rounds.get(round_id)
+    if not current or not current.get("message_id"):
+        return
+
+    async def refresh():
+        latest = match_rounds.get(round_id)
+        if not latest:
+            return
+        message = bot.get_channel(latest["channel_id"]).get_partial_message(latest["message_id"])
+        await message.edit(embed=match_round_embed(round_id, latest))
+
+    dispatcher.submit(
+        PRIORITY_BACKGROUND,
+        ("channel", current["channel_id"]),
+        refresh,
+        coalesce=("match_round", round_id)
+    )
+
+async def run_match_round(round_id):
+    """Assign every ranked player in one batch and close the round."""
+    current = match_rounds.pop(round_id, None)
+    if current is None:
+        return None
+    task = match_round_tasks.pop(round_id, None)
+    if task is not None and task is not asyncio.current_task():
+        task.cancel()
+
+    events = [event_id for event_id in current["events"] if event_id in event_signups]
+    seated_already = {user_id for event_id in events for user_id in event_signups[event_id]["accepted"]}
+    rankings = {
+        user_id: [event_id for event_id in ranking["events"] if event_id in event_signups]
+        for user_id, ranking in current["rankings"].items()
+        if user_id not in seated_already
+    }
+    seats = {
+        event_id: max(0, event_signups[event_id]["max_participants"] - len(event_signups[event_id]["accepted"]))
+        for event_id in events
+    }
+    assignment = await asyncio.to_thread(assign_parties, rankings, seats, recent_attendance())
+
+    waitlisted = 0
+    for user_id, ranked in rankings.items():
+        if user_id in assignment:
+            for event_id in ranked:
+                event_signups[event_id]["waitlist"].discard(user_id)
+            character = current["rankings"][user_id].get("character")
+            event_signups[assignment[user_id]]["accepted"][user_id] = character or "No description provided."
+        elif ranked:
+            event_signups[ranked[0]]["waitlist"].add(user_id)
+            waitlisted += 1
+
+    # Leftover seats go back to first come
+    for event_id in events:
+        event_signups[event_id].pop("ranked", None)
     save_events()
+    save_match_rounds()
+    for event_id in events:
+        queue_event_refresh(event_signups[event_id].get("channel_id") or current["channel_id"], event_id)
+
+    satisfied = sum(1 for user_id, event_id in assignment.items() if rankings[user_id][0] == event_id)
+    summary = (
+        f"Seated {len(assignment)} of {len(rankings)} player(s) across {len(events)} session(s); "
+        f"{satisfied} got their first choice, {waitlisted} waitlisted."
+    )
+    channel = bot.get_channel(current["channel_id"])
+    if channel is not None:
+        closed = match_round_embed(round_id, current)
+        closed.set_footer(text=f"Round {round_id} • closed")
+        closed.add_field(name="Result", value=summary, inline=False)
+        if current.get("message_id"):
+            round_message = channel.get_partial_message(current["message_id"])
+            dispatcher.submit(PRIORITY_BACKGROUND, ("channel", channel.id), lambda: round_message.edit(embed=closed))
+        else:
+            dispatcher.submit(PRIORITY_MESSAGE, ("channel", channel.id), lambda: channel.send(embed=closed))
+    print(f"🎲 Round {round_id}: {summary}")
+    return summary
+
+async def match_round_at_cutoff(round_id):
+    current = match_rounds.get(round_id)
+    if current is None:
+        return
+    delay = (current["cutoff"] - datetime.now(timezone.utc)).total_seconds()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    try:
+        await run_match_round(round_id)
+    except Exception:
+        traceback.print_exc()
+
+def schedule_match_round(round_id):
+    task = match_round_tasks.get(round_id)
+    if task is None or task.done():
+        match_round_tasks[round_id] = asyncio.create_task(match_round_at_cutoff(round_id))
+
+@bot.tree.command(name="matchround", description="Open a matchmaking round over every ranked-signup event")
+@app_commands.describe(cutoff="When seats are assigned, ISO 8601 YYYY-MM-DDTHH:MM:SS (Pacific time if no offset)")
+async def matchround(interaction: discord.Interaction, cutoff: str):
+    if interaction.user.id not in allowed_user_ids:
+        await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+        return
+
+    try:
+        parsed_time = parser.isoparse(cutoff)
+        if parsed_time.tzinfo is None:
+            parsed_time = PST.localize(parsed_time)
+    except Exception:
+        await interaction.response.send_message(
+            "Invalid time format. Use ISO8601 (YYYY-MM-DDTHH:MM:SS).",
+            ephemeral=True
+        )
+        return
+
+    in_rounds = {event_id for current in match_rounds.values() for event_id in current["events"]}
+    events = [
+        event_id for event_id, data in event_signups.items()
+        if data.get("ranked") and event_id not in in_rounds
+    ]
+    if not events:
+        await interaction.response.send_message(
+            "There are no ranked-signup events outside an open round. Create them with `/event ranked_signup:True`.",
+            ephemeral=True
+        )
+        return
+    events.sort(key=lambda event_id: event_signups[event_id].get("event_time") or datetime.max.replace(tzinfo=timezone.utc))
+
+    round_id = next_id(ID_MATCH_ROUND, match_rounds)
+    new_round = {
+        "events": events,
+        "cutoff": parsed_time.astimezone(timezone.utc),
+        "channel_id": interaction.channel_id,
+        "message_id": None,
+        "created_by": interaction.user.id,
+        "rankings": {}
+    }
+    match_rounds[round_id] = new_round
+
+    await interaction.response.send_message(embed=match_round_embed(round_id, new_round))
+    message = await interaction.original_response()
+    new_round["message_id"] = message.id
+    save_match_rounds()
+    schedule_match_round(round_id)
+
+@bot.tree.command(name="rankevents", description="Rank the sessions of a matchmaking round, best first")
+@app_commands.describe(
+    round="Round ID from the round's footer",
+    choices="Session numbers from the round post, best first, e.g. '2,1,3', or 'clear'",
+    character="Character you'd bring (used for whichever session you're seated in)"
+)
+async def rankevents(interaction: discord.Interaction, round: int, choices: str, character: str = None):
+    current = match_rounds.get(round)
+    if not current:
+        await interaction.response.send_message(f"No open matchmaking round with ID {round}.", ephemeral=True)
+        return
+
+    if choices.strip().lower() == "clear":
+        current["rankings"].pop(interaction.user.id, None)
+        save_match_rounds()
+        await interaction.response.send_message("Your ranking was removed.", ephemeral=True)
+        queue_match_round_refresh(round)
+        return
+
+    ranked = []
+    for part in re.split(r"[,\s]+", choices.strip()):
+        if not part.isdigit() or not 1 <= int(part) <= len(current["events"]):
+            await interaction.response.send_message(
+                f"'{part}' isn't a session number. Use numbers 1–{len(current['events'])} from the round post.",
+                ephemeral=True
+            )
+            return
+        event_id = current["events"][int(part) - 1]
+        if event_id not in ranked and event_id in event_signups:
+            ranked.append(event_id)
+    if not ranked:
+        await interaction.response.send_message("None of those sessions are still open.", ephemeral=True)
+        return
+
+    current["rankings"][interaction.user.id] = {"events": ranked, "character": character}
+    save_match_rounds()
+    order = "\n".join(f"{rank}. {event_signups[event_id]['title']}" for rank, event_id in enumerate(ranked, 1))
+    await interaction.response.send_message(
+        f"Saved your ranking:\n{order}\nSeats are assigned <t:{int(current['cutoff'].timestamp())}:R>.",
+        ephemeral=True
+    )
+    queue_match_round_refresh(round)
+
+@bot.tree.command(name="matchrun", description="Assign a matchmaking round's seats now instead of at the cutoff")
+@app_commands.describe(round="Round ID from the round's footer")
+async def matchrun(interaction: discord.Interaction, round: int):
+    if interaction.user.id not in allowed_user_ids:
+        await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+        return
+    if round not in match_rounds:
+        await interaction.response.send_message(f"No open matchmaking round with ID {round}.", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True)
+    summary = await run_match_round(round)
+    send_followup(interaction, summary or "That round was already assigned.")
 
 # ---- Vault commands ----
 
@@ -604,13 +1873,16 @@ async def additem(
         await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
         return
 
-    vault.setdefault(user.id, []).append({
+    item = {
         "description": description,
         "link": link,
         "rarity": rarity.value if rarity else "Common",
         "types": types.value if types else "Other"
-    })
+    }
+    vault.setdefault(user.id, []).append(item)
+    vault_index.add(user.id, item)
     save_vault()
+    log_vault_change(interaction.user.id, user.id, "add", item=dict(item))
     embed = discord.Embed(
         title="Item Added",
         color=discord.Color.green()
@@ -621,6 +1893,18 @@ async def additem(
     if link:
         embed.add_field(name="Link", value=f"[Click Here]({link})", inline=True)
 
+    wanted_by = trade_matcher.posts_wanting(user.id, item)
+    if wanted_by:
+        embed.add_field(
+            name="🔁 Wanted In Trade",
+            value="\n".join(
+                f"• [{trade_matcher.posts[post_id]['wanted'][:80]}]({trade_post_url(interaction.guild_id, post_id)})"
+                for post_id in wanted_by[:TRADE_SUGGESTIONS]
+            ),
+            inline=False
+        )
+        announce_trade_matches({post_id: [(user.id, item)] for post_id in wanted_by})
+
     await interaction.response.send_message(embed=embed)
 
 @bot.tree.command(name="removeitem", description="Remove an item from a user's vault")
@@ -654,9 +1938,11 @@ async def removeitem(
             and (link is None or item.get("link") == link)
             and item.get("rarity", "Common") == target_rarity
             and item.get("types", "Other") == target_type):
+            vault_index.remove(item)
             del items[i]
             found = True
             save_vault()
+            log_vault_change(interaction.user.id, user.id, "remove", item=dict(item), index=i)
             break
 
     if found:
@@ -705,12 +1991,131 @@ async def showvault(interaction: discord.Interaction, user: discord.User = None)
     embed.set_image(url="https://cdn.discordapp.com/attachments/1404353825573441546/1404994722925121636/Party_Inventory.jpg?ex=689d36cd&is=689be54d&hm=70c56a91815ce92ac5f8345b21b2ba050852bf26c22ff76bec198bb7a9528c6a&")
     await interaction.response.send_message(embed=embed)
 
-@bot.tree.command(name="exportvault", description="Export the entire vault data as a JSON file")
-async def exportvault(interaction: discord.Interaction):
+# ---- Columnar export ----
+# Flat tables for offline analysis. Rarity and type repeat on every row, so
+# they are dictionary-encoded; Parquet keeps that encoding on disk.
+
+EXPORT_FORMAT_CHOICES = [
+    app_commands.Choice(name="JSON", value="json"),
+    app_commands.Choice(name="Parquet", value="parquet"),
+    app_commands.Choice(name="Arrow", value="arrow"),
+]
+
+def snapshot_export_rows():
+    """Copy vault, signups and history into flat row lists.
+
+    Runs on the event loop so the worker thread never sees a half-applied
+    mutation.
+    """
+    vault_rows = [
+        {
+            "user_id": user_id,
+            "description": item.get("description"),
+            "link": item.get("link"),
+            "rarity": item.get("rarity", "Common"),
+            "types": item.get("types", "Other"),
+        }
+        for user_id, items in vault.items()
+        for item in items
+    ]
+
+    signup_rows = []
+    for event_id, data in event_signups.items():
+        base = {
+            "event_id": event_id,
+            "title": data.get("title"),
+            "event_time": data.get("event_time"),
+            "max_participants": data.get("max_participants"),
+        }
+        for user_id, desc in data.get("accepted", {}).items():
+            signup_rows.append({**base, "user_id": user_id, "status": "accepted", "character": desc})
+        for user_id in data.get("waitlist", []):
+            signup_rows.append({**base, "user_id": user_id, "status": "waitlist", "character": None})
+
+    history_rows = []
+    for event_id, data in event_history.items():
+        players = data.get("players", [])
+        player_ids = data.get("player_ids") or [None] * len(players)
+        for user_id, character in zip(player_ids, players):
+            history_rows.append({
+                "event_id": event_id,
+                "title": data.get("title"),
+                "event_time": data.get("event_time"),
+                "finished_at": data.get("finished_at"),
+                "ended_by": data.get("ended_by"),
+                "summary": data.get("summary"),
+                "user_id": user_id,
+                "character": character,
+            })
+
+    return vault_rows, signup_rows, history_rows
+
+EXPORT_SCHEMAS = {
+    "vault": pa.schema([
+        ("user_id", pa.int64()),
+        ("description", pa.string()),
+        ("link", pa.string()),
+        ("rarity", pa.dictionary(pa.int16(), pa.string())),
+        ("types", pa.dictionary(pa.int16(), pa.string())),
+    ]),
+    "signups": pa.schema([
+        ("event_id", pa.int64()),
+        ("title", pa.dictionary(pa.int32(), pa.string())),
+        ("event_time", pa.timestamp("s", tz="UTC")),
+        ("max_participants", pa.int32()),
+        ("user_id", pa.int64()),
+        ("status", pa.dictionary(pa.int16(), pa.string())),
+        ("character", pa.string()),
+    ]),
+    "history": pa.schema([
+        ("event_id", pa.int64()),
+        ("title", pa.dictionary(pa.int32(), pa.string())),
+        ("event_time", pa.timestamp("s", tz="UTC")),
+        ("finished_at", pa.timestamp("s", tz="UTC")),
+        ("ended_by", pa.dictionary(pa.int32(), pa.string())),
+        ("summary", pa.string()),
+        ("user_id", pa.int64()),
+        ("character", pa.string()),
+    ]),
+}
+
+def build_export_files(fmt, tables):
+    """Serialize each row list to Parquet or Arrow IPC. Runs in a worker thread."""
+    files = []
+    for name, rows in tables.items():
+        table = pa.Table.from_pylist(rows, schema=EXPORT_SCHEMAS[name])
+        buffer = BytesIO()
+        if fmt == "parquet":
+            pq.write_table(table, buffer, compression="zstd")
+        else:
+            feather.write_feather(table, buffer, compression="zstd")
+        buffer.seek(0)
+        files.append((f"{name}.{fmt}", buffer))
+    return files
+
+@bot.tree.command(name="exportvault", description="Export the vault (JSON) or vault, signups and history (Parquet/Arrow)")
+@app_commands.describe(format="JSON for re-import, Parquet or Arrow for analysis")
+@app_commands.choices(format=EXPORT_FORMAT_CHOICES)
+async def exportvault(interaction: discord.Interaction, format: app_commands.Choice[str] = None):
     if interaction.user.id not in allowed_user_ids:
         await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
         return
 
+    if format and format.value != "json":
+        await interaction.response.defer(ephemeral=True)
+        vault_rows, signup_rows, history_rows = snapshot_export_rows()
+        files = await asyncio.to_thread(
+            build_export_files,
+            format.value,
+            {"vault": vault_rows, "signups": signup_rows, "history": history_rows}
+        )
+        send_followup(
+            interaction,
+            f"Here is the exported campaign data ({format.name}).",
+            files=[File(fp=buffer, filename=filename) for filename, buffer in files]
+        )
+        return
+
     # Serialize vault dictionary to JSON string
     vault_json = json.dumps(vault, indent=4)
     
@@ -731,21 +2136,700 @@ async def importvaultfile(interaction: discord.Interaction, file: discord.Attach
         await interaction.response.send_message("You do not have permission.", ephemeral=True)
         return
     
+    await interaction.response.defer(ephemeral=True)
+
     try:
         content = await file.read()
-        new_vault = json.loads(content.decode())
-        if not isinstance(new_vault, dict):
-            raise ValueError("Invalid format")
+        new_vault, bad = VAULT_STATE.validate_document(json.loads(content.decode()))
 
+        before = {user_id: [dict(item) for item in items] for user_id, items in vault.items()}
         vault.clear()
-        vault.update({int(k): v for k, v in new_vault.items()})
+        vault.update(new_vault)
+        vault_index.rebuild(vault)
         save_vault()
 
-        await interaction.response.send_message("Vault imported successfully!", ephemeral=True)
+        # One "set" per user whose items changed, grouped so /vaultundo reverts the whole import
+        batch = vault_log.seq + 1
+        found = {}  # trade post id -> newly imported items it wants
+        for user_id in sorted(before.keys() | new_vault.keys()):
+            after = new_vault.get(user_id, [])
+            if before.get(user_id, []) != after:
+                log_vault_change(
+                    interaction.user.id, user_id, "set",
+                    items=[dict(item) for item in after],
+                    before=before.get(user_id, []),
+                    batch=batch
+                )
+                remaining = list(before.get(user_id, []))
+                for item in after:
+                    if item in remaining:
+                        remaining.remove(item)
+                        continue
+                    for post_id in trade_matcher.posts_wanting(user_id, item):
+                        found.setdefault(post_id, []).append((user_id, item))
+        announce_trade_matches(found)
+
+        if bad:
+            VAULT_STATE.quarantine(bad)
+            send_followup(interaction, f"Vault imported. Skipped {len(bad)} invalid item(s); see {VAULT_FILE}.quarantine.json.")
+        else:
+            send_followup(interaction, "Vault imported successfully!")
     except Exception as e:
-        await interaction.response.send_message(f"Error importing: {e}", ephemeral=True)
+        send_followup(interaction, f"Error importing: {e}")
+
+
+# ---- Vault audit log ----
+# Every vault mutation is appended to vault_log.jsonl as one JSON line:
+#   {"seq", "ts", "actor", "user_id", "op", ...}
+# where op is "add" (item, optional index), "remove" (item, index) or "set"
+# (items, before). Every VAULT_CHECKPOINT_EVERY entries the whole vault is
+# snapshotted into VAULT_CHECKPOINT_DIR as <seq>-<ts_ms>-<log offset>.json,
+# so point-in-time reads replay at most one segment of the log. Undo never
+# rewrites history; it appends the inverse entries tagged with "undoes".
+
+VAULT_LOG_FILE = "vault_log.jsonl"
+VAULT_CHECKPOINT_DIR = "vault_checkpoints"
+VAULT_CHECKPOINT_EVERY = 100
+
+OP_EMOJIS = {"add": "➕", "remove": "➖", "set": "📥"}
+
+def apply_vault_entry(target, entry, index=None):
+    """Apply one logged mutation to a vault-shaped dict.
+
+    Returns False if the entry no longer applies (e.g. removing an item that
+    is already gone). Keeps ``index`` in step when given.
+    """
+    user_id = entry["user_id"]
+    items = target.setdefault(user_id, [])
+    op = entry["op"]
+
+    if op == "add":
+        item = dict(entry["item"])
+        position = entry.get("index")
+        if position is None or position > len(items):
+            items.append(item)
+        else:
+            items.insert(position, item)
+        if index is not None:
+            index.add(user_id, item)
+    elif op == "remove":
+        position = entry.get("index")
+        if position is None or position >= len(items) or items[position] != entry["item"]:
+            position = next((i for i, item in enumerate(items) if item == entry["item"]), None)
+            if position is None:
+                return False
+        if index is not None:
+            index.remove(items[position])
+        del items[position]
+    elif op == "set":
+        if index is not None:
+            for item in items:
+                index.remove(item)
+        items[:] = [dict(item) for item in entry["items"]]
+        if index is not None:
+            for item in items:
+                index.add(user_id, item)
+        if not items:
+            del target[user_id]  # e.g. undoing an import that introduced this user
+    return True
+
+def invert_vault_entry(entry):
+    base = {"user_id": entry["user_id"], "undoes": entry["seq"]}
+    if entry["op"] == "add":
+        return {**base, "op": "remove", "item": entry["item"]}
+    if entry["op"] == "remove":
+        return {**base, "op": "add", "item": entry["item"], "index": entry.get("index")}
+    return {**base, "op": "set", "items": entry["before"], "before": entry["items"]}
+
+class VaultAuditLog:
+    def __init__(self, path, checkpoint_dir, checkpoint_every):
+        self.path = path
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_every = checkpoint_every
+        self.seq = 0
+        self.since_checkpoint = 0
+        self.checkpoints = []  # (seq, ts_ms, log offset, filename), oldest first
+
+    def load(self, current_vault):
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        self.checkpoints = []
+        for name in os.listdir(self.checkpoint_dir):
+            try:
+                seq, ts_ms, offset = (int(part) for part in name.removesuffix(".json").split("-"))
+            except ValueError:
+                continue
+            self.checkpoints.append((seq, ts_ms, offset, name))
+        self.checkpoints.sort()
+
+        # Only the tail after the last checkpoint needs reading to find our place.
+        start = self.checkpoints[-1][2] if self.checkpoints else 0
+        self.seq = self.checkpoints[-1][0] if self.checkpoints else 0
+        self.since_checkpoint = 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb+") as f:
+                f.seek(start)
+                tail = f.read()
+                if tail and not tail.endswith(b"\n"):
+                    # Drop a half-written line left by a crash mid-append
+                    f.truncate(start + tail.rfind(b"\n") + 1)
+            for entry in self.read_segment(start):
+                self.seq = entry["seq"]
+                self.since_checkpoint += 1
+
+        if not self.checkpoints:
+            self.checkpoint(current_vault)  # baseline for vaults that predate the log
+
+    def record(self, entry):
+        self.seq += 1
+        entry = {"seq": self.seq, "ts": round(time.time(), 3), **entry}
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        self.since_checkpoint += 1
+        return entry
+
+    def maybe_checkpoint(self, current_vault):
+        if self.since_checkpoint >= self.checkpoint_every:
+            self.checkpoint(current_vault)
+
+    def checkpoint(self, current_vault):
+        offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        ts_ms = int(time.time() * 1000)
+        name = f"{self.seq}-{ts_ms}-{offset}.json"
+        with open(os.path.join(self.checkpoint_dir, name), "wb") as f:
+            f.write(VAULT_STATE.envelope.dump_json({"version": STATE_VERSION, "data": current_vault}))
+        self.checkpoints.append((self.seq, ts_ms, offset, name))
+        self.since_checkpoint = 0
+
+    def read_segment(self, start, end=None):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            raw = f.read() if end is None else f.read(end - start)
+        entries = []
+        for line in raw.splitlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        return entries
+
+    def newest_first(self):
+        """Yield log entries newest first, one checkpoint segment at a time."""
+        end = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        bounds = sorted({0, *(offset for _, _, offset, _ in self.checkpoints)})
+        for start in reversed(bounds):
+            if start >= end:
+                continue
+            yield from reversed(self.read_segment(start, end))
+            end = start
+
+    def history(self, user_id, limit):
+        entries = []
+        for entry in self.newest_first():
+            if entry["user_id"] == user_id:
+                entries.append(entry)
+                if len(entries) >= limit:
+                    break
+        return entries
+
+    def undo_targets(self, user_id=None):
+        """Return the newest change that hasn't been undone, newest first.
+
+        Without ``user_id`` a whole batch (an import) counts as one change.
+        With it, only that user's entry is returned, even from a batch.
+        """
+        undone = set()
+        targets = []
+        for entry in self.newest_first():
+            if targets:
+                if user_id is not None:
+                    break
+                if entry.get("batch") is None or entry.get("batch") != targets[0].get("batch"):
+                    break
+                if entry["seq"] not in undone:
+                    targets.append(entry)
+                continue
+            if "undoes" in entry:
+                undone.add(entry["undoes"])
+                continue
+            if entry["seq"] in undone or (user_id is not None and entry["user_id"] != user_id):
+                continue
+            targets.append(entry)
+        return targets
+
+    def reconstruct(self, user_id, at):
+        """Rebuild one user's items as of ``at`` (unix seconds), or None if before the log."""
+        at_ms = at * 1000
+        later = [i for i, cp in enumerate(self.checkpoints) if cp[1] > at_ms]
+        position = later[0] if later else len(self.checkpoints)
+        if position == 0:
+            return None
+        base = self.checkpoints[position - 1]
+        # Everything past the next checkpoint is newer than `at`, so only
+        # this checkpoint's segment is read.
+        end = self.checkpoints[position][2] if later else None
+        with open(os.path.join(self.checkpoint_dir, base[3]), "rb") as f:
+            snapshot = VAULT_STATE.envelope.validate_json(f.read())["data"]
+
+        state = {user_id: snapshot.get(user_id, [])}
+        for entry in self.read_segment(base[2], end):
+            if entry["ts"] * 1000 > at_ms:
+                break
+            if entry["user_id"] == user_id:
+                apply_vault_entry(state, entry)
+        return state[user_id]
+
+vault_log = VaultAuditLog(VAULT_LOG_FILE, VAULT_CHECKPOINT_DIR, VAULT_CHECKPOINT_EVERY)
+
+def log_vault_change(actor, user_id, op, **fields):
+    """Record a mutation that has already been applied to `vault`."""
+    entry = vault_log.record({"actor": actor, "user_id": user_id, "op": op, **fields})
+    vault_log.maybe_checkpoint(vault)
+    return entry
+
+def describe_vault_entry(entry):
+    actor = display_name(entry.get("actor"))
+    prefix = "↩️ " if "undoes" in entry else ""
+    if entry["op"] == "set":
+        what = f"vault replaced ({len(entry['before'])} → {len(entry['items'])} items)"
+    else:
+        what = f"**{entry['item'].get('description')}**"
+    return f"`#{entry['seq']}` <t:{int(entry['ts'])}:R> {prefix}{OP_EMOJIS[entry['op']]} {what} — by {actor}"
+
+@bot.tree.command(name="vaulthistory", description="Show recent changes to a user's vault")
+@app_commands.describe(user="User whose vault history to show", limit="How many changes to show (default 15)")
+async def vaulthistory(interaction: discord.Interaction, user: discord.User, limit: app_commands.Range[int, 1, 50] = 15):
+    await interaction.response.defer(ephemeral=True)
+
+    entries = vault_log.history(user.id, limit)
+    embed = discord.Embed(
+        title=f"{user.display_name}'s Vault History",
+        color=discord.Color.blue()
+    )
+    embed.description = "\n".join(describe_vault_entry(e) for e in entries) if entries else "No recorded changes."
+    send_followup(interaction, None, embed=embed)
+
+@bot.tree.command(name="vaultundo", description="Undo the latest vault change; a whole import counts as one unless a user is given")
+@app_commands.describe(user="Only undo this user's latest change, including just their part of an import (optional)")
+async def vaultundo(interaction: discord.Interaction, user: discord.User = None):
+    if interaction.user.id not in allowed_user_ids:
+        await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+        return
+
+    targets = vault_log.undo_targets(user.id if user else None)
+    if not targets:
+        await interaction.response.send_message("Nothing to undo.", ephemeral=True)
+        return
+
+    batch = vault_log.seq + 1 if len(targets) > 1 else None
+    lines = []
+    for entry in targets:
+        inverse = invert_vault_entry(entry)
+        applied = apply_vault_entry(vault, inverse, vault_index)
+        if batch is not None:
+            inverse["batch"] = batch
+        # Recorded even when it no longer applies, so the change counts as undone
+        log_vault_change(interaction.user.id, inverse.pop("user_id"), inverse.pop("op"), **inverse)
+        lines.append(describe_vault_entry(entry) + ("" if applied else " *(already gone)*"))
+    save_vault()
+
+    embed = discord.Embed(
+        title="Vault Change Undone",
+        description="\n".join(lines[:20]) + (f"\n…and {len(lines) - 20} more" if len(lines) > 20 else ""),
+        color=discord.Color.orange()
+    )
+    await interaction.response.send_message(embed=embed)
+
+@bot.tree.command(name="vaultasof", description="Show a user's vault as it was at a past time")
+@app_commands.describe(
+    user="User whose vault to show",
+    time="Point in time in ISO 8601 format, YYYY-MM-DDTHH:MM:SS (Pacific time if no offset)"
+)
+async def vaultasof(interaction: discord.Interaction, user: discord.User, time: str):
+    try:
+        parsed_time = parser.isoparse(time)
+        if parsed_time.tzinfo is None:
+            parsed_time = PST.localize(parsed_time)
+    except Exception:
+        await interaction.response.send_message(
+            "Invalid time format. Use ISO8601 (YYYY-MM-DDTHH:MM:SS).",
+            ephemeral=True
+        )
+        return
+
+    await interaction.response.defer()
+
+    items = vault_log.reconstruct(user.id, parsed_time.timestamp())
+    embed = discord.Embed(
+        title=f"{user.display_name}'s Vault",
+        color=discord.Color.blue()
+    )
+    embed.set_footer(text=f"As of {parsed_time.strftime('%Y-%m-%d %H:%M %Z')}")
+    if items is None:
+        embed.description = "No vault records go back that far."
+    elif not items:
+        embed.description = "No items in the vault."
+    else:
+        lines = []
+        for item in items:
+            rarity = item.get("rarity", "Common")
+            types = item.get("types", "Other")
+            lines.append(f"• **{item.get('description')}** — *{RARITY_EMOJIS.get(rarity, '')} {rarity}* — _{TYPE_EMOJIS.get(types, '')} {types}_")
+        description = "\n".join(lines)
+        embed.description = description if len(description) <= 4000 else description[:4000] + "…"
+    send_followup(interaction, None, ephemeral=False, embed=embed)
+
+# ---- Item search ----
+# Inverted index over every vault so lookups touch only the postings for the
+# query terms instead of scanning every user's list. Items are plain dicts
+# living in `vault`, so they are tracked by identity.
+
+SEARCH_STOPWORDS = {"a", "an", "the", "of", "and", "or", "to", "in", "on", "for", "with"}
+SEARCH_PAGE_SIZE = 10
+SEARCH_MAX_TERMS = 8  # more terms than this barely move the ranking
+
+def tokenize(text):
+    tokens = []
+    for token in re.findall(r"[a-z0-9']+", (text or "").lower()):
+        token = token.strip("'")
+        if not token or token in SEARCH_STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]  # cheap plural folding: "boots" -> "boot"
+        tokens.append(token)
+    return tokens
+
+class VaultIndex:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.docs = {}       # doc_id -> (user_id, item)
+        self.phrases = {}    # doc_id -> normalized description, for phrase matches
+        self.doc_ids = {}    # id(item) -> doc_id
+        self.postings = {}   # token -> set of doc_ids
+        self.rarities = {}   # rarity -> set of doc_ids
+        self.types = {}      # type -> set of doc_ids
+        self.counter = itertools.count()
+
+    def rebuild(self, vault_data):
+        self.clear()
+        for user_id, items in vault_data.items():
+            for item in items:
+                self.add(user_id, item)
+
+    def add(self, user_id, item):
+        doc_id = next(self.counter)
+        self.docs[doc_id] = (user_id, item)
+        self.doc_ids[id(item)] = doc_id
+        tokens = tokenize(item.get("description"))
+        self.phrases[doc_id] = f" {' '.join(tokens)} "
+        for token in set(tokens):
+            self.postings.setdefault(token, set()).add(doc_id)
+        self.rarities.setdefault(item.get("rarity", "Common"), set()).add(doc_id)
+        self.types.setdefault(item.get("types", "Other"), set()).add(doc_id)
+        return doc_id
+
+    def remove(self, item):
+        doc_id = self.doc_ids.pop(id(item), None)
+        if doc_id is None:
+            return
+        self.docs.pop(doc_id, None)
+        self.phrases.pop(doc_id, None)
+        for token in set(tokenize(item.get("description"))):
+            self._discard(self.postings, token, doc_id)
+        self._discard(self.rarities, item.get("rarity", "Common"), doc_id)
+        self._discard(self.types, item.get("types", "Other"), doc_id)
+
+    @staticmethod
+    def _discard(table, key, doc_id):
+        ids = table.get(key)
+        if ids is not None:
+            ids.discard(doc_id)
+            if not ids:
+                del table[key]
+
+    def search(self, query=None, rarity=None, types=None, start=0, count=SEARCH_PAGE_SIZE):
+        """Return (total, hits) where hits is one page of (user_id, item) pairs.
+
+        Terms are OR-ed and weighted by how rare they are across all vaults;
+        items containing the whole query as a phrase rank above the rest, and
+        ties go to the item indexed first. Items containing the same set of
+        terms score the same, so the page is filled tier by tier, best term
+        set first, and tiers past the page are never looked at. Rarity and
+        type facets filter the candidates.
+        """
+        facets = []
+        if rarity:
+            facets.append(self.rarities.get(rarity, set()))
+        if types:
+            facets.append(self.types.get(types, set()))
+        allowed = set.intersection(*sorted(facets, key=len)) if facets else None
+
+        terms = tokenize(query)
+        wanted = start + count
+        if not terms:
+            if allowed is None:
+                return 0, []
+            return len(allowed), [self.docs[d] for d in heapq.nsmallest(wanted, allowed)[start:]]
+
+        total = len(self.docs)
+        present = sorted((t for t in set(terms) if t in self.postings), key=lambda t: len(self.postings[t]))
+        present = present[:SEARCH_MAX_TERMS]  # the rarest terms carry the ranking
+        weights = {t: math.log(1 + total / len(self.postings[t])) for t in present}
+
+        matches = set().union(*(self.postings[t] for t in present))
+        if allowed is not None:
+            matches &= allowed
+
+        # Group term sets by score; combinations keep the rarest-first order,
+        # so each intersection starts from the smallest posting list.
+        tiers = {}
+        for size in range(len(present), 0, -1):
+            for combo in itertools.combinations(present, size):
+                tiers.setdefault(round(sum(weights[t] for t in combo), 9), []).append(combo)
+
+        phrase = f" {' '.join(terms)} "
+        check_phrase = len(terms) > 1 and len(present) == len(set(terms))
+        page = []
+        for score in sorted(tiers, reverse=True):
+            if len(page) >= wanted:
+                break
+            tier = set()
+            for combo in tiers[score]:
+                docs = set.intersection(*(self.postings[t] for t in combo))
+                for t in present:
+                    if t not in combo and docs:
+                        docs = docs.difference(self.postings[t])
+                tier |= docs
+            if allowed is not None:
+                tier &= allowed
+
+            need = wanted - len(page)
+            if check_phrase and len(tiers[score][0]) == len(present):
+                exact, rest = [], []
+                for doc_id in sorted(tier):
+                    if phrase in self.phrases[doc_id]:
+                        exact.append(doc_id)
+                        if len(exact) >= need:
+                            break
+                    elif len(rest) < need:
+                        rest.append(doc_id)
+                page.extend((exact + rest)[:need])
+            else:
+                page.extend(heapq.nsmallest(need, tier))
+        return len(matches), [self.docs[doc_id] for doc_id in page[start:]]
+
+vault_index = VaultIndex()
+
+@bot.tree.command(name="finditem", description="Search every vault for an item")
+@app_commands.describe(
+    query="Words from the item description (optional if a facet is given)",
+    rarity="Only show items of this rarity",
+    types="Only show items of this type",
+    page="Result page to show"
+)
+@app_commands.choices(rarity=RARITY_CHOICES, types=TYPES_CHOICES)
+async def finditem(
+    interaction: discord.Interaction,
+    query: str = None,
+    rarity: app_commands.Choice[str] = None,
+    types: app_commands.Choice[str] = None,
+    page: app_commands.Range[int, 1] = 1
+):
+    if not query and not rarity and not types:
+        await interaction.response.send_message("Give a search query, a rarity or a type.", ephemeral=True)
+        return
+
+    total, hits = vault_index.search(
+        query,
+        rarity=rarity.value if rarity else None,
+        types=types.value if types else None,
+        start=(page - 1) * SEARCH_PAGE_SIZE
+    )
+
+    filters = [f"**{query}**" if query else None, rarity.value if rarity else None, types.value if types else None]
+    embed = discord.Embed(
+        title="Item Search",
+        color=discord.Color.blue()
+    )
+
+    pages = max(1, math.ceil(total / SEARCH_PAGE_SIZE))
+    if not total:
+        embed.description = f"No items found for {' • '.join(f for f in filters if f)}."
+    elif not hits:
+        embed.description = f"Only {pages} page(s) of results."
+    else:
+        lines = []
+        for user_id, item in hits:
+            member = bot.get_user(user_id)
+            owner = member.display_name if member else f"<User {user_id}>"
+            item_rarity = item.get("rarity", "Common")
+            item_types = item.get("types", "Other")
+            line = (
+                f"• **{item.get('description')}** — *{RARITY_EMOJIS.get(item_rarity, '')} {item_rarity}* "
+                f"— _{TYPE_EMOJIS.get(item_types, '')} {item_types}_ — {owner}"
+            )
+            if item.get("link"):
+                line += f" ([link]({item['link']}))"
+            lines.append(line)
+        embed.description = "\n".join(lines)
+        embed.set_footer(text=f"{total} result(s) for {' • '.join(f.strip('*') for f in filters if f)} — page {page}/{pages}")
+
+    await interaction.response.send_message(embed=embed)
 
 
+# ---- Trade matching ----
+# Open trade posts are indexed by what they want. A want is split into
+# alternatives ("boots of speed or a rare ring"), and each alternative into
+# search terms plus any rarity and type it names. A new post is matched
+# against vault_index to suggest owners; an item added later is matched
+# against the wants index through the postings for its own terms only, so a
+# busy trade channel never rescans every vault or every post.
+
+TRADE_MATCH_OVERLAP = 0.6  # share of an alternative's terms an item must contain
+TRADE_SUGGESTIONS = 5
+WANT_SEPARATORS = re.compile(r",|;|/|\bor\b", re.IGNORECASE)
+WANT_FILLER = {"any", "anything", "some", "something", "offer", "obo", "similar", "item"}
+RARITY_TERMS = {" ".join(tokenize(c.value)): c.value for c in RARITY_CHOICES if tokenize(c.value)}
+TYPE_TERMS = {" ".join(tokenize(c.value)): c.value for c in TYPES_CHOICES}
+
+def parse_want(text):
+    """Split a wanted description into [{"terms", "rarities", "types"}] alternatives."""
+    alternatives = []
+    for part in WANT_SEPARATORS.split(text or ""):
+        phrase = f" {' '.join(tokenize(part))} "
+        rarities, types = set(), set()
+        for table, found in ((RARITY_TERMS, rarities), (TYPE_TERMS, types)):
+            for words in sorted(table, key=len, reverse=True):  # "very rare" before "rare"
+                while f" {words} " in phrase:
+                    found.add(table[words])
+                    phrase = phrase.replace(f" {words} ", " ", 1)
+        terms = sorted(set(phrase.split()) - WANT_FILLER)
+        if terms or rarities or types:
+            alternatives.append({"terms": terms, "rarities": rarities, "types": types})
+    return alternatives
+
+def want_score(want, tokens, rarity, item_type):
+    """Share of the alternative's terms found in an item's tokens, 0 if it doesn't match."""
+    if want["rarities"] and rarity not in want["rarities"]:
+        return 0
+    if want["types"] and item_type not in want["types"]:
+        return 0
+    if not want["terms"]:
+        return 1.0
+    hits = sum(1 for term in want["terms"] if term in tokens)
+    if hits < math.ceil(TRADE_MATCH_OVERLAP * len(want["terms"])):
+        return 0
+    return hits / len(want["terms"])
+
+def owners_for_wants(wants, poster_id, limit=TRADE_SUGGESTIONS):
+    """Best vault items (as (user_id, item)) for a parsed want, skipping the poster's own."""
+    best = {}
+    for want in wants:
+        if want["terms"]:
+            candidates = set().union(*(vault_index.postings.get(term, set()) for term in want["terms"]))
+        else:
+            facets = []
+            if want["rarities"]:
+                facets.append(set().union(*(vault_index.rarities.get(r, set()) for r in want["rarities"])))
+            if want["types"]:
+                facets.append(set().union(*(vault_index.types.get(t, set()) for t in want["types"])))
+            candidates = set.intersection(*sorted(facets, key=len))
+        for doc_id in candidates:
+            user_id, item = vault_index.docs[doc_id]
+            if user_id == poster_id:
+                continue
+            score = want_score(
+                want, set(vault_index.phrases[doc_id].split()),
+                item.get("rarity", "Common"), item.get("types", "Other")
+            )
+            if score > best.get(doc_id, 0):
+                best[doc_id] = score
+    ranked = heapq.nsmallest(limit, best, key=lambda d: (-best[d], vault_index.phrases[d], d))
+    return [vault_index.docs[doc_id] for doc_id in ranked]
+
+class TradeMatcher:
+    def __init__(self):
+        self.posts = {}     # post_id -> {"poster_id", "channel_id", "wanted", "wants"}
+        self.by_term = {}   # token -> set of (post_id, alternative number)
+        self.by_facet = {}  # ("rarity" | "types", value) -> keys of alternatives with no terms
+
+    def _keys(self, post_id, wants):
+        for number, want in enumerate(wants):
+            key = (post_id, number)
+            if want["terms"]:
+                for term in want["terms"]:
+                    yield self.by_term, term, key
+            else:
+                facet = "types" if want["types"] else "rarity"
+                for value in want["types"] or want["rarities"]:
+                    yield self.by_facet, (facet, value), key
+
+    def add_post(self, post_id, poster_id, channel_id, wanted, wants=None):
+        wants = parse_want(wanted) if wants is None else wants
+        self.posts[post_id] = {"poster_id": poster_id, "channel_id": channel_id, "wanted": wanted, "wants": wants}
+        for table, term, key in self._keys(post_id, wants):
+            table.setdefault(term, set()).add(key)
+
+    def remove_post(self, post_id):
+        post = self.posts.pop(post_id, None)
+        if post is None:
+            return
+        for table, term, key in self._keys(post_id, post["wants"]):
+            VaultIndex._discard(table, term, key)
+
+    def posts_wanting(self, user_id, item):
+        """Ids of open posts (not the owner's own) that an item would satisfy."""
+        tokens = set(tokenize(item.get("description")))
+        rarity = item.get("rarity", "Common")
+        item_type = item.get("types", "Other")
+        keys = set(self.by_facet.get(("rarity", rarity), ())) | self.by_facet.get(("types", item_type), set())
+        for token in tokens:
+            keys |= self.by_term.get(token, set())
+
+        matched = set()
+        for post_id, number in keys:
+            post = self.posts[post_id]
+            if post_id in matched or post["poster_id"] == user_id:
+                continue
+            if want_score(post["wants"][number], tokens, rarity, item_type):
+                matched.add(post_id)
+        return sorted(matched)
+
+trade_matcher = TradeMatcher()
+
+def trade_post_url(guild_id, post_id):
+    return f"https://discord.com/channels/{guild_id}/{trade_matcher.posts[post_id]['channel_id']}/{post_id}"
+
+def announce_trade_matches(found):
+    """Reply on each trade post with the newly added items that match it.
+
+    ``found`` maps post id -> [(user_id, item)], so an import that matches a
+    post several times still costs one reply.
+    """
+    for post_id, hits in found.items():
+        post = trade_matcher.posts.get(post_id)
+        channel = bot.get_channel(post["channel_id"]) if post else None
+        if channel is None:
+            continue
+        lines = [f"• **{item.get('description')}** — {display_name(user_id)}" for user_id, item in hits[:TRADE_SUGGESTIONS]]
+        if len(hits) > TRADE_SUGGESTIONS:
+            lines.append(f"…and {len(hits) - TRADE_SUGGESTIONS} more")
+        embed = discord.Embed(
+            title="Trade Match",
+            description="Newly added to a vault, and matching what you want:\n" + "\n".join(lines),
+            color=discord.Color.gold()
+        )
+        embed.set_footer(text=f"Wanted: {post['wanted']}"[:200])
+        post_message = channel.get_partial_message(post_id)
+        dispatcher.submit(
+            PRIORITY_MESSAGE,
+            ("channel", channel.id),
+            lambda message=post_message, embed=embed, poster=post["poster_id"]: message.reply(content=f"<@{poster}>", embed=embed)
+        )
+
 trade_interest_messages = {}  # key: message_id (interest msg) -> dict with original_poster_id, interested_user_id, trade_post_id
 trade_sessions = {}  # key: trade_interest_message_id -> original_tradepost_message_id
 
@@ -786,14 +2870,30 @@ async def tradepost(interaction: discord.Interaction, item_description: str, wan
     if link:
         embed.add_field(name="Link", value=f"[Click Here]({link})", inline=True)
 
+    wants = parse_want(wanted_description)
+    suggestions = owners_for_wants(wants, user_id)
+    if suggestions:
+        embed.add_field(
+            name="🔎 Already In A Vault",
+            value="\n".join(f"• **{item.get('description')}** — {display_name(owner)}" for owner, item in suggestions)[:FIELD_VALUE_LIMIT],
+            inline=False
+        )
+
     embed.set_footer(text=f"Posted for trade by {interaction.user.display_name}")
 
     await interaction.response.send_message(embed=embed)
     message = await interaction.original_response()
-    await message.add_reaction("🙋")  # Reaction to show interest
+    dispatcher.submit(
+        PRIORITY_BACKGROUND,
+        ("channel", message.channel.id),
+        lambda: message.add_reaction("🙋")  # Reaction to show interest
+    )
 
     # Save who posted this trade for reaction validation later
     trade_interest_messages[message.id] = user_id
+    trade_matcher.add_post(message.id, user_id, message.channel.id, wanted_description, wants)
+    if traffic_recorder:
+        traffic_recorder.note_created(message.id)
     # Note: You do not have a response attribute on message, just store with message.id
     # You will map interest messages to this original tradepost message in on_reaction_add
 
@@ -801,15 +2901,20 @@ async def tradepost(interaction: discord.Interaction, item_description: str, wan
 async def on_reaction_add(reaction, user):
     if user.bot:
         return
+    if traffic_recorder:
+        traffic_recorder.record_reaction(reaction, user)
 
     message = reaction.message
     emoji = reaction.emoji
+    bucket = ("channel", message.channel.id)
 
     # Interest reaction on trade post message
     if emoji == "🙋" and message.embeds:
         embed_title = message.embeds[0].title
 
         if embed_title == "Item For Trade":
+            if message.id not in trade_interest_messages:
+                return  # trade post expired or predates the last restart
             # Someone is interested in trade, create a reply message with ✅ react
             interested_embed = discord.Embed(
                 title="Trade Interest",
@@ -821,17 +2926,27 @@ async def on_reaction_add(reaction, user):
             )
             interested_embed.set_footer(text=f"React to accept trade. Trade Post ID: {message.id}")
 
-            interest_message = await message.reply(embed=interested_embed)
-            await interest_message.add_reaction("✅")
+            async def post_interest():
+                interest_message = await message.reply(embed=interested_embed)
+
+                original_poster_id = trade_interest_messages.get(message.id)
+                trade_interest_messages[interest_message.id] = {
+                    "original_poster_id": original_poster_id,
+                    "interested_user_id": user.id,
+                    "trade_post_id": message.id
+                }
+                # Map interest message id to original tradepost message id for future reference
+                trade_sessions[interest_message.id] = message.id
+                if traffic_recorder:
+                    traffic_recorder.note_created(interest_message.id)
+
+                dispatcher.submit(
+                    PRIORITY_BACKGROUND,
+                    bucket,
+                    lambda: interest_message.add_reaction("✅")
+                )
 
-            original_poster_id = trade_interest_messages.get(message.id)
-            trade_interest_messages[interest_message.id] = {
-                "original_poster_id": original_poster_id,
-                "interested_user_id": user.id,
-                "trade_post_id": message.id
-            }
-            # Map interest message id to original tradepost message id for future reference
-            trade_sessions[interest_message.id] = message.id
+            dispatcher.submit(PRIORITY_MESSAGE, bucket, post_interest)
 
     # Accept trade reaction on interest message
     elif emoji == "✅" and message.embeds:
@@ -861,9 +2976,12 @@ async def on_reaction_add(reaction, user):
                 )
                 accepted_embed.set_footer(text=f"Trade post ID: {data['trade_post_id']}")
 
-                await message.edit(embed=accepted_embed)
-                await message.clear_reactions()
-                await message.add_reaction("📦")  # Reaction for transaction complete
+                async def swap_reactions():
+                    await message.clear_reactions()
+                    await message.add_reaction("📦")  # Reaction for transaction complete
+
+                dispatcher.submit(PRIORITY_MESSAGE, bucket, lambda: message.edit(embed=accepted_embed))
+                dispatcher.submit(PRIORITY_BACKGROUND, bucket, swap_reactions)
 
     # Transaction complete reaction by admin
     elif emoji == "📦" and message.embeds:
@@ -878,15 +2996,18 @@ async def on_reaction_add(reaction, user):
             if not original_msg_id:
                 return
 
-            # Fetch the channel and original message object
             channel = message.channel
-            original_msg = await channel.fetch_message(original_msg_id)
+            original_msg = channel.get_partial_message(original_msg_id)
+            trade_matcher.remove_post(original_msg_id)
+
+            async def disable_reactions():
+                # Remove 🙋 reaction from the original TradePost embed message to disable it
+                await original_msg.clear_reaction("🙋")
 
-            # Remove 📦 reaction from the original TradePost embed message to disable it
-            await original_msg.clear_reaction("🙋")
+                # Remove the 📦 reaction from the Trade Accepted message to disable it
+                await message.clear_reaction(emoji)
 
-            # Remove the 📦 reaction from the Trade Accepted message to disable it
-            await message.clear_reaction(emoji)
+            dispatcher.submit(PRIORITY_BACKGROUND, bucket, disable_reactions)
 
             # Find the two traders from trade_interest_messages mapping
             traders = trade_interest_messages.get(message.id)
@@ -904,9 +3025,13 @@ async def on_reaction_add(reaction, user):
 
                 mention_text = " ".join(mentions) if mentions else ""
 
-                await message.channel.send(
-                    content=f"✅ Transaction has been completed by **{user.display_name}**! {mention_text}",
-                    reference=message.to_reference(fail_if_not_exists=False)
+                dispatcher.submit(
+                    PRIORITY_MESSAGE,
+                    bucket,
+                    lambda: message.channel.send(
+                        content=f"✅ Transaction has been completed by **{user.display_name}**! {mention_text}",
+                        reference=message.to_reference(fail_if_not_exists=False)
+                    )
                 )
 
                 # Optionally clean up tracking data here
@@ -914,6 +3039,526 @@ async def on_reaction_add(reaction, user):
                 del trade_sessions[message.id]
 
 
+# ---- Reports ----
+# Charts are rendered in a separate process so matplotlib never blocks the
+# event loop. The input to each chart is a small JSON-able summary, and the
+# PNG is cached under a hash of that summary, so repeat requests are free
+# until the underlying data changes.
+
+REPORT_CHOICES = [
+    app_commands.Choice(name="Vault rarity and type", value="vault"),
+    app_commands.Choice(name="Attendance over time", value="attendance"),
+    app_commands.Choice(name="Waitlist pressure", value="waitlist"),
+]
+REPORT_CACHE_SIZE = 32
+
+report_pool = None
+report_cache = OrderedDict()  # content hash -> PNG bytes
+
+def display_name(user_id):
+    member = bot.get_user(user_id) if user_id is not None else None
+    return member.display_name if member else f"<User {user_id}>"
+
+def report_data(kind):
+    """Summarize the state a chart depends on. Cheap; runs on the loop."""
+    if kind == "vault":
+        rarities = {}
+        types = {}
+        for user_id, items in vault.items():
+            if not items:
+                continue
+            name = display_name(user_id)
+            player_rarities = rarities.setdefault(name, {})
+            player_types = types.setdefault(name, {})
+            for item in items:
+                rarity = item.get("rarity", "Common")
+                item_type = item.get("types", "Other")
+                player_rarities[rarity] = player_rarities.get(rarity, 0) + 1
+                player_types[item_type] = player_types.get(item_type, 0) + 1
+        return {"rarities": rarities, "types": types}
+
+    if kind == "attendance":
+        sessions = []
+        per_player = {}
+        for data in event_history.values():
+            when = data.get("event_time") or data.get("finished_at")
+            if when is None:
+                continue
+            players = data.get("player_ids") or []
+            sessions.append([when.date().isoformat(), len(data.get("players", []))])
+            for user_id in players:
+                name = display_name(user_id)
+                per_player[name] = per_player.get(name, 0) + 1
+        sessions.sort()
+        return {"sessions": sessions, "per_player": per_player}
+
+    events = []
+    for data in event_signups.values():
+        events.append([
+            data.get("title") or "Event",
+            len(data.get("accepted", {})),
+            data.get("max_participants", 0),
+            len(data.get("waitlist", [])),
+        ])
+    events.sort(key=lambda e: -e[3])
+    return {"events": events}
+
+def stacked_barh(ax, counts, title):
+    players = sorted(counts)
+    categories = sorted({c for per in counts.values() for c in per})
+    left = np.zeros(len(players))
+    for category in categories:
+        values = np.array([counts[p].get(category, 0) for p in players])
+        ax.barh(players, values, left=left, label=category)
+        left += values
+    ax.set_title(title)
+    ax.legend(fontsize="small", loc="lower right")
+
+def render_report(kind, data):
+    """Render one chart to PNG bytes. Runs in the report process pool."""
+    if kind == "vault":
+        height = max(3, 0.4 * len(data["rarities"]) + 1.5)
+        fig, (left, right) = plt.subplots(1, 2, figsize=(12, height), sharey=True)
+        stacked_barh(left, data["rarities"], "Items by rarity")
+        stacked_barh(right, data["types"], "Items by type")
+    elif kind == "attendance":
+        fig, (top, bottom) = plt.subplots(2, 1, figsize=(10, 8))
+        if data["sessions"]:
+            dates = np.array([d for d, _ in data["sessions"]], dtype="datetime64[D]")
+            counts = np.array([c for _, c in data["sessions"]])
+            top.plot(dates, counts, marker="o")
+            top.fill_between(dates, counts, alpha=0.2)
+        top.set_title("Players per session")
+        top.tick_params(axis="x", rotation=30)
+        top.yaxis.set_major_locator(MaxNLocator(integer=True))
+        players = sorted(data["per_player"], key=data["per_player"].get, reverse=True)
+        bottom.bar(players, [data["per_player"][p] for p in players])
+        bottom.set_title("Sessions attended")
+        bottom.yaxis.set_major_locator(MaxNLocator(integer=True))
+        bottom.tick_params(axis="x", rotation=45)
+    else:
+        events = data["events"]
+        fig, ax = plt.subplots(figsize=(10, max(3, 0.5 * len(events) + 1.5)))
+        titles = [e[0] for e in events]
+        accepted = np.array([e[1] for e in events])
+        open_seats = np.maximum(np.array([e[2] for e in events]) - accepted, 0)
+        waitlisted = np.array([e[3] for e in events])
+        ax.barh(titles, accepted, label="Accepted")
+        ax.barh(titles, open_seats, left=accepted, label="Open seats")
+        ax.barh(titles, waitlisted, left=accepted + open_seats, label="Waitlist")
+        ax.set_title("Waitlist pressure per open event")
+        ax.legend(fontsize="small")
+
+    fig.tight_layout()
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png", dpi=110)
+    plt.close(fig)
+    return buffer.getvalue()
+
+async def get_report_png(kind):
+    global report_pool
+    data = report_data(kind)
+    key = hashlib.sha256(json.dumps([kind, data], sort_keys=True).encode()).hexdigest()
+
+    png = report_cache.get(key)
+    if png is not None:
+        report_cache.move_to_end(key)
+        return png
+
+    for attempt in range(2):
+        if report_pool is None:
+            # spawn, not fork: the HTTP server, the slow-callback watchdog and
+            # to_thread workers are running, and a forked child could inherit
+            # one of their locks held and deadlock.
+            report_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            png = await asyncio.get_running_loop().run_in_executor(report_pool, render_report, kind, data)
+            break
+        except BrokenProcessPool:
+            report_pool = None  # the worker died; the next try starts a fresh one
+            if attempt:
+                raise
+
+    report_cache[key] = png
+    if len(report_cache) > REPORT_CACHE_SIZE:
+        report_cache.popitem(last=False)
+    return png
+
+@bot.tree.command(name="report", description="Show a chart of vault contents, attendance or waitlists")
+@app_commands.describe(kind="Which chart to render")
+@app_commands.choices(kind=REPORT_CHOICES)
+async def report(interaction: discord.Interaction, kind: app_commands.Choice[str]):
+    await interaction.response.defer()
+
+    png = await get_report_png(kind.value)
+    send_followup(
+        interaction,
+        f"📊 {kind.name}",
+        ephemeral=False,
+        file=File(fp=BytesIO(png), filename=f"{kind.value}_report.png")
+    )
+
+# ---- Expiry sweeper ----
+# Past events and abandoned trade interests otherwise live in memory (and in
+# the startup view registration) forever. TTLs are read from the environment.
+
+EVENT_ARCHIVE_AFTER = timedelta(hours=float(os.getenv("EVENT_ARCHIVE_AFTER_HOURS", 12)))
+TRADE_INTEREST_TTL = timedelta(days=float(os.getenv("TRADE_INTEREST_TTL_DAYS", 7)))
+SWEEP_INTERVAL_SECONDS = int(os.getenv("SWEEP_INTERVAL_SECONDS", 30 * 60))
+
+sweeper_task = None
+
+def archive_event(message_id, summary, ended_by):
+    """Move an event from event_signups into event_history and return the entry."""
+    data = event_signups.pop(message_id, None)
+    if data is None:
+        return None
+    entry = {
+        "title": data.get("title") or "Event",
+        "players": list(data["accepted"].values()),
+        "player_ids": list(data["accepted"].keys()),
+        "summary": summary,
+        "ended_by": ended_by,
+        "event_time": data.get("event_time"),
+        "finished_at": datetime.now(timezone.utc)
+    }
+    event_history[message_id] = entry
+    return entry
+
+def retire_event_view(message_id, channel_id):
+    """Grey out an event's buttons and drop its view from the view store."""
+    event_renderers.pop(message_id, None)
+    view = event_views.pop(message_id, None)
+    if view is None:
+        view = EventView(message_id, 0, "")
+    for child in view.children:
+        child.disabled = True
+    view.stop()  # unregisters it; the edit below won't re-register a stopped view
+
+    channel = bot.get_channel(channel_id) if channel_id else None
+    if channel is None:
+        print(f"⚠️ Couldn't grey out the buttons of event {message_id}: its channel is unknown")
+        return
+    event_message = channel.get_partial_message(message_id)
+    dispatcher.submit(
+        PRIORITY_BACKGROUND,
+        ("channel", channel_id),
+        lambda: event_message.edit(view=view)
+    )
+
+async def backfill_event_channels():
+    """Record the channel of events saved before channel_id was stored.
+
+    Without it, archiving can't edit the post and its buttons stay live.
+    Channels are searched the way reminders find their message, once per
+    event; the result is saved so later startups skip it.
+    """
+    missing = [message_id for message_id, data in event_signups.items() if not data.get("channel_id")]
+    if not missing:
+        return
+    channels = [channel for guild in bot.guilds for channel in guild.text_channels]
+    found = 0
+    for message_id in missing:
+        for channel in channels:
+            try:
+                await channel.fetch_message(message_id)
+            except discord.HTTPException:
+                continue
+            event_signups[message_id]["channel_id"] = channel.id
+            found += 1
+            break
+    save_events()
+    print(f"🔎 Found the channel of {found} of {len(missing)} event(s) saved without one")
+
+def sweep_expired(now=None):
+    now = now or datetime.now(timezone.utc)
+
+    archived = 0
+    for message_id, data in list(event_signups.items()):
+        event_time = data.get("event_time")
+        if event_time is None or event_time + EVENT_ARCHIVE_AFTER > now:
+            continue
+        channel_id = data.get("channel_id")
+        archive_event(message_id, "Archived automatically after the session.", "Auto-archive")
+        retire_event_view(message_id, channel_id)
+        archived += 1
+
+    # Message ids are snowflakes, so their age is free to compute.
+    cutoff = now - TRADE_INTEREST_TTL
+    expired = 0
+    for message_id in list(trade_interest_messages):
+        if discord.utils.snowflake_time(message_id) < cutoff:
+            del trade_interest_messages[message_id]
+            trade_matcher.remove_post(message_id)
+            expired += 1
+    for message_id in list(trade_sessions):
+        if message_id not in trade_interest_messages:
+            del trade_sessions[message_id]
+
+    if archived:
+        save_events()
+        save_history()
+    return archived, expired
+
+async def expiry_sweeper():
+    while True:
+        await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+        try:
+            archived, expired = sweep_expired()
+            if archived or expired:
+                print(f"🧹 Archived {archived} past event(s), expired {expired} trade interest(s)")
+        except Exception:
+            traceback.print_exc()
+
+# ---- Profiling ----
+# Two tools for finding work that blocks the event loop in production:
+# an always-on slow-callback detector, and /profile, which samples the loop
+# thread's stack and uploads it as collapsed stacks (one "a;b;c count" line
+# per unique stack) for flamegraph.pl or speedscope.
+
+SLOW_CALLBACK_MS = float(os.getenv("SLOW_CALLBACK_MS", 100))
+PROFILE_INTERVAL_SECONDS = 0.005
+IDLE_LEAVES = ("select", "poll", "EpollSelector.select", "KqueueSelector.select", "SelectSelector.select")
+BOT_SOURCE = os.path.abspath(__file__)
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+def stack_labels(frame):
+    """Labels for a frame's stack, outermost first."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+def bot_frames(frame):
+    """Names of this module's functions on a stack, outermost first.
+
+    Falls back to the innermost frame when the stack never enters this module
+    (e.g. stuck inside a library call made from a library task).
+    """
+    leaf = frame_label(frame)
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        if os.path.abspath(code.co_filename) == BOT_SOURCE and not code.co_qualname.startswith("SlowCallbackDetector"):
+            names.append(code.co_qualname)
+        frame = frame.f_back
+    names.reverse()
+    return names or [leaf]
+
+def describe_callback(callback):
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        names = []
+        coro = owner.get_coro()
+        while coro is not None and hasattr(coro, "cr_code"):
+            names.append(coro.cr_code.co_qualname)
+            coro = coro.cr_await
+        return f"{owner.get_name()}: {' → '.join(names) or 'done'}"
+    return getattr(callback, "__qualname__", repr(callback))
+
+class SlowCallbackDetector:
+    """Log every loop callback that runs longer than the threshold.
+
+    Handle._run is wrapped to time each callback. A watchdog thread grabs the
+    loop thread's stack while a callback is still overrunning, so the log
+    names the handler and the function it was stuck in, even when the
+    handler finished in that same step.
+    """
+
+    def __init__(self, threshold_ms):
+        self.threshold = threshold_ms / 1000
+        self.loop_thread = None
+        self.running = None   # (start, handle) of the callback on the loop right now
+        self.captured = None  # (handle, bot frame names) grabbed by the watchdog
+        self.original_run = None
+
+    def install(self):
+        if self.original_run is not None:
+            return
+        self.loop_thread = threading.get_ident()
+        self.original_run = asyncio.events.Handle._run
+        detector = self
+
+        def timed_run(handle):
+            start = time.perf_counter()
+            detector.running = (start, handle)
+            try:
+                detector.original_run(handle)
+            finally:
+                detector.running = None
+                elapsed = time.perf_counter() - start
+                if elapsed >= detector.threshold:
+                    detector.report(handle, elapsed)
+
+        asyncio.events.Handle._run = timed_run
+        Thread(target=self.watchdog, daemon=True, name="slow-callback-watchdog").start()
+
+    def watchdog(self):
+        while True:
+            time.sleep(self.threshold / 2)
+            running = self.running
+            if running is None:
+                continue
+            start, handle = running
+            if time.perf_counter() - start < self.threshold or (self.captured and self.captured[0] is handle):
+                continue
+            frame = sys._current_frames().get(self.loop_thread)
+            if frame is not None:
+                self.captured = (handle, bot_frames(frame))
+
+    def report(self, handle, elapsed):
+        where = ""
+        if self.captured and self.captured[0] is handle and self.captured[1]:
+            where = f" in {' → '.join(self.captured[1])}"
+        self.captured = None
+        print(f"🐢 Event loop blocked {elapsed * 1000:.0f} ms by {describe_callback(handle._callback)}{where}")
+
+slow_callbacks = SlowCallbackDetector(SLOW_CALLBACK_MS)
+
+def sample_stacks(thread_id, seconds, interval=PROFILE_INTERVAL_SECONDS):
+    """Sample a thread's stack for ``seconds``; returns {collapsed stack: count}."""
+    counts = {}
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            key = ";".join(stack_labels(frame))
+            counts[key] = counts.get(key, 0) + 1
+        del frame
+        time.sleep(interval)
+    return counts
+
+@bot.tree.command(name="profile", description="Sample the running bot and upload a flamegraph-ready profile")
+@app_commands.describe(seconds="How long to sample for (1-60)")
+async def profile(interaction: discord.Interaction, seconds: app_commands.Range[int, 1, 60] = 10):
+    if interaction.user.id not in allowed_user_ids:
+        await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True)
+
+    counts = await asyncio.to_thread(sample_stacks, threading.get_ident(), seconds)
+    total = sum(counts.values()) or 1
+
+    # Leaf functions with the most samples, ignoring time parked in select()
+    leaves = {}
+    for stack, count in counts.items():
+        leaf = stack.rsplit(";", 1)[-1]
+        leaves[leaf] = leaves.get(leaf, 0) + count
+    idle = sum(count for leaf, count in leaves.items() if leaf.startswith(IDLE_LEAVES))
+    busiest = sorted(
+        ((leaf, count) for leaf, count in leaves.items() if not leaf.startswith(IDLE_LEAVES)),
+        key=lambda pair: -pair[1]
+    )[:5]
+    summary = "\n".join(f"`{count * 100 / total:5.1f}%` {leaf}" for leaf, count in busiest) or "Nothing but idle time."
+
+    collapsed = "\n".join(f"{stack} {count}" for stack, count in sorted(counts.items(), key=lambda pair: -pair[1]))
+    send_followup(
+        interaction,
+        f"Sampled {sum(counts.values())} stacks over {seconds}s, {idle * 100 / total:.0f}% idle.\n{summary}",
+        file=File(fp=BytesIO(collapsed.encode()), filename="profile.collapsed")
+    )
+
+# ---- Traffic recording ----
+# Opt-in: set RECORD_TRAFFIC_FILE to append every interaction and reaction to
+# a JSONL file that benchmarks/replay_traffic.py can feed back through the
+# real handlers. Ids are replaced by small per-recording counters and free
+# text by same-length placeholders (identical text maps to the same
+# placeholder, so /additem then /removeitem of one item still matches).
+# Messages the bot creates are logged as "created" so the replayer can tie
+# later clicks and reactions to the post they landed on.
+
+TRAFFIC_FILE = os.getenv("RECORD_TRAFFIC_FILE")
+TRAFFIC_KEEP_PARAMS = {"time", "start", "rrule", "times", "choices", "cutoff"}  # needed verbatim for replay to take the same path
+
+class TrafficRecorder:
+    def __init__(self, path):
+        self.path = path
+        self.start = time.time()
+        self.ids = {}    # (kind, real id) -> anonymized id
+        self.counters = {}
+        self.texts = {}  # real text -> placeholder
+
+    def anon(self, kind, value):
+        if value is None:
+            return None
+        key = (kind, value)
+        if key not in self.ids:
+            self.counters[kind] = self.counters.get(kind, 0) + 1
+            self.ids[key] = self.counters[kind]
+        return self.ids[key]
+
+    def anon_text(self, text):
+        if text not in self.texts:
+            tag = f"t{len(self.texts) + 1}"
+            self.texts[text] = tag + "x" * max(0, len(text) - len(tag))
+        return self.texts[text]
+
+    def write(self, record):
+        record["t"] = round(time.time() - self.start, 3)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def user_fields(self, user):
+        return {"user": self.anon("user", user.id), "admin": user.id in allowed_user_ids}
+
+    def note_created(self, message_id):
+        self.write({"kind": "created", "message": self.anon("message", message_id)})
+
+    def record_reaction(self, reaction, user):
+        self.write({
+            "kind": "reaction",
+            "emoji": str(reaction.emoji),
+            "message": self.anon("message", reaction.message.id),
+            "channel": self.anon("channel", reaction.message.channel.id),
+            **self.user_fields(user)
+        })
+
+    def record_interaction(self, interaction):
+        data = interaction.data or {}
+        record = {
+            "channel": self.anon("channel", interaction.channel_id),
+            "message": self.anon("message", interaction.message.id) if interaction.message else None,
+            **self.user_fields(interaction.user)
+        }
+        if interaction.type == discord.InteractionType.component:
+            record.update(kind="component", custom_id=data.get("custom_id"))
+        elif interaction.type == discord.InteractionType.modal_submit:
+            lengths = [
+                len(component.get("value") or "")
+                for row in data.get("components", [])
+                for component in row.get("components", [])
+            ]
+            record.update(kind="modal", lengths=lengths)
+        elif interaction.type == discord.InteractionType.application_command:
+            record.update(kind="command", name=data.get("name"), args=self.command_args(data))
+        else:
+            return
+        self.write(record)
+
+    def command_args(self, data):
+        command = bot.tree.get_command(data.get("name"))
+        with_choices = {p.name for p in command.parameters if p.choices} if command else set()
+        args = {}
+        for option in data.get("options", []):
+            name, kind, value = option["name"], option["type"], option.get("value")
+            if kind == discord.AppCommandOptionType.user.value:
+                args[name] = {"user": self.anon("user", int(value))}
+            elif kind == discord.AppCommandOptionType.attachment.value:
+                args[name] = {"attachment": True}
+            elif kind == discord.AppCommandOptionType.string.value and name not in with_choices | TRAFFIC_KEEP_PARAMS:
+                args[name] = self.anon_text(value)
+            else:
+                args[name] = value
+        return args
+
+traffic_recorder = TrafficRecorder(TRAFFIC_FILE) if TRAFFIC_FILE else None
+
 # ---- Help command ----
 @bot.tree.command(name="help", description="Show list of all commands and their descriptions")
 async def help_command(interaction: discord.Interaction):
@@ -934,24 +3579,60 @@ async def help_command(interaction: discord.Interaction):
 
 @bot.event
 async def on_ready():
-    load_events()  # restore from disk
-    load_vault()   # restore vault
+    dispatcher.start()
+    slow_callbacks.install()
+    try:
+        load_events()  # restore from disk
+        load_vault()   # restore vault
+        vault_log.load(vault)
+        load_history() # restore finished adventures
+        load_id_counters()
+        load_series()  # restore recurring event definitions
+        load_polls()   # restore availability polls
+        load_match_rounds()  # restore open matchmaking rounds
+    except StateVersionError as e:
+        # Running on empty state would overwrite the newer files on the first save
+        print(f"❌ {e}")
+        await bot.close()
+        return
 
     guild = discord.Object(id=GUILD_ID)
     bot.tree.copy_global_to(guild=guild)
     await bot.tree.sync(guild=guild)
 
+    # Archive anything that expired while offline before paying to re-register it
+    await backfill_event_channels()
+    sweep_expired()
+
     # Re-attach views for all saved events
     for message_id, data in event_signups.items():
         view = EventView(message_id, data["max_participants"], data["title"])
         bot.add_view(view, message_id=message_id)
+        event_views[message_id] = view
+
+    global series_task
+    if series_task is None or series_task.done():
+        series_task = asyncio.create_task(series_scheduler())
+    global sweeper_task
+    if sweeper_task is None or sweeper_task.done():
+        sweeper_task = asyncio.create_task(expiry_sweeper())
+    for round_id in match_rounds:
+        schedule_match_round(round_id)
 
     print(f"✅ Logged in as {bot.user} and synced commands to guild {GUILD_ID}")
     save_events()
 
+@bot.event
+async def on_interaction(interaction: discord.Interaction):
+    if traffic_recorder:
+        traffic_recorder.record_interaction(interaction)
+
 @bot.tree.error
 async def on_app_command_error(interaction: discord.Interaction, error):
-    await interaction.response.send_message(f"Error: {error}", ephemeral=True)
+    if interaction.response.is_done():
+        send_followup(interaction, f"Error: {error}")
+    else:
+        await interaction.response.send_message(f"Error: {error}", ephemeral=True)
 
 
 # Minimal HTTP server
@@ -970,6 +3651,8 @@ def run_server():
     server = HTTPServer(('', port), Handler)
     server.serve_forever()
 
-Thread(target=run_server).start()
+if __name__ == "__main__":
+    # Guarded so report worker processes can import this module safely.
+    Thread(target=run_server).start()
 
-bot.run(TOKEN)
+    bot.run(TOKEN)